@@ -0,0 +1,194 @@
+"""
+Vectorized productivity metrics.
+
+Task history is pulled once per user as plain columns and turned into NumPy
+arrays, so streaks, moving averages and heatmaps cost a handful of array
+operations instead of Python loops over model instances. Timestamps are moved
+to the user's wall clock with the UTC offset in force at each of them: the
+zone's offset changes over the history's date range are found once, and every
+row picks its offset with np.searchsorted, so day and hour buckets stay right
+across DST changes. Results are cached per user under a data generation, which
+changes whenever the user's tasks do.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from api.models import Task
+from users.timezones import user_zone
+
+SECONDS_PER_DAY = 86400
+TREND_DAYS = 90
+# 1970-01-01 was a Thursday, so epoch day 0 is weekday 3 (Monday == 0)
+EPOCH_WEEKDAY = 3
+
+
+def data_generation(user):
+    """
+    Cheap fingerprint of a user's task data.
+    Any create, update or delete changes the count or the latest updated_at.
+    """
+    stats = Task.objects.filter(user=user).aggregate(count=Count('uid'), latest=Max('updated_at'))
+    latest = stats['latest'].timestamp() if stats['latest'] else 0
+    return f"{stats['count']}:{latest}"
+
+
+@lru_cache(maxsize=256)
+def offset_changes(zone, first_day, last_day):
+    """
+    (start, UTC offset) arrays, in epoch seconds, for the offsets `zone` uses
+    between epoch days `first_day` and `last_day`. The zone is probed once per
+    day, and each change is narrowed down to the second; zones change offset at
+    most once a day.
+    """
+    def offset(seconds):
+        return datetime.fromtimestamp(seconds, zone).utcoffset().total_seconds()
+
+    starts = [first_day * SECONDS_PER_DAY]
+    offsets = [offset(starts[0])]
+    for day in range(first_day + 1, last_day + 2):
+        if offset(day * SECONDS_PER_DAY) == offsets[-1]:
+            continue
+        low, high = (day - 1) * SECONDS_PER_DAY, day * SECONDS_PER_DAY
+        while high - low > 1:
+            middle = (low + high) // 2
+            if offset(middle) == offsets[-1]:
+                low = middle
+            else:
+                high = middle
+        starts.append(high)
+        offsets.append(offset(high))
+    return np.array(starts, np.float64), np.array(offsets, np.float64)
+
+
+def local_seconds(moments, zone, count):
+    """Seconds since the epoch on the wall clock of `zone` for aware datetimes"""
+    seconds = np.fromiter((moment.timestamp() for moment in moments), np.float64, count)
+    if not count:
+        return seconds
+    starts, offsets = offset_changes(
+        zone, int(seconds.min() // SECONDS_PER_DAY), int(seconds.max() // SECONDS_PER_DAY)
+    )
+    return seconds + offsets[np.searchsorted(starts, seconds, side='right') - 1]
+
+
+def load_columns(user, zone):
+    """Fetch (created_at, updated_at, completed, due_date) as NumPy arrays, times local to `zone`"""
+    rows = list(
+        Task.objects.filter(user=user)
+        .order_by()
+        .values_list('created_at', 'updated_at', 'completed', 'due_date')
+    )
+    count = len(rows)
+    if not count:
+        created, updated, completed, due = (), (), (), ()
+    else:
+        created, updated, completed, due = zip(*rows)
+
+    return {
+        'created': local_seconds(created, zone, count),
+        'updated': local_seconds(updated, zone, count),
+        'completed': np.fromiter(completed, np.bool_, count),
+        'due_day': np.array(due, dtype='datetime64[D]').astype(np.int64),
+    }
+
+
+def _daily_counts(days, start, end):
+    """Number of events per day for the inclusive day range [start, end]"""
+    days = days[(days >= start) & (days <= end)]
+    return np.bincount(days - start, minlength=end - start + 1)
+
+
+def completion_streaks(completion_days, today):
+    if not completion_days.size:
+        return {'current_streak': 0, 'longest_streak': 0, 'active_days': 0}
+
+    first = min(int(completion_days.min()), today)
+    active = _daily_counts(completion_days, first, today) > 0
+
+    # Runs of active days start where the padded series goes 0 -> 1 and end where it goes 1 -> 0
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+
+    # A streak is still current if it reaches today or yesterday
+    current = 0
+    if lengths.size and ends[-1] >= active.size - 1:
+        current = int(lengths[-1])
+
+    return {
+        'current_streak': current,
+        'longest_streak': int(lengths.max()) if lengths.size else 0,
+        'active_days': int(active.sum()),
+    }
+
+
+def moving_averages(completion_days, today, days=TREND_DAYS, windows=(7, 30)):
+    """Daily completions with trailing moving averages over the last `days` days"""
+    longest = max(windows)
+    start = today - days + 1
+    counts = _daily_counts(completion_days, start - longest + 1, today)
+    cumulative = np.concatenate(([0], np.cumsum(counts)))
+
+    series = {'completed': counts[longest - 1:].tolist()}
+    for window in windows:
+        totals = cumulative[window:] - cumulative[:-window]
+        series[f'ma_{window}'] = np.round(totals[longest - window:] / window, 2).tolist()
+
+    dates = np.arange(start, today + 1).astype('datetime64[D]').astype(str).tolist()
+    return {'dates': dates, **series}
+
+
+def activity_heatmap(completion_seconds):
+    """Completions bucketed into a 7x24 weekday-by-hour grid"""
+    seconds = completion_seconds.astype(np.int64)
+    weekday = (seconds // SECONDS_PER_DAY + EPOCH_WEEKDAY) % 7
+    hour = (seconds % SECONDS_PER_DAY) // 3600
+    grid = np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24)
+    return {
+        'weekdays': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+        'hours': list(range(24)),
+        'counts': grid.tolist(),
+    }
+
+
+def compute(user, zone=None):
+    zone = zone or user_zone(user.pk)
+    columns = load_columns(user, zone)
+    today = int(np.datetime64(timezone.localdate(timezone=zone), 'D').astype(np.int64))
+
+    # Completion time is approximated by the last update of a completed task
+    completed = columns['completed']
+    completion_seconds = columns['updated'][completed]
+    completion_days = (completion_seconds // SECONDS_PER_DAY).astype(np.int64)
+
+    total = int(completed.size)
+    on_time = int((completion_days <= columns['due_day'][completed]).sum())
+
+    return {
+        'streaks': {
+            **completion_streaks(completion_days, today),
+            'total_tasks': total,
+            'completed_tasks': int(completed.sum()),
+            'on_time_rate': round(on_time / completion_days.size * 100, 2) if completion_days.size else 0,
+        },
+        'trend': moving_averages(completion_days, today),
+        'heatmap': activity_heatmap(completion_seconds),
+    }
+
+
+def productivity_metrics(user):
+    """Return cached metrics for the user's current data generation, computing them on a miss"""
+    zone = user_zone(user.pk)
+    key = f'analytics:productivity:{user.pk}:{data_generation(user)}:{zone}:{timezone.localdate(timezone=zone)}'
+    metrics = cache.get(key)
+    if metrics is None:
+        metrics = compute(user, zone)
+        cache.set(key, metrics, getattr(settings, 'ANALYTICS_ENGINE_CACHE_TIMEOUT', 3600))
+    return metrics
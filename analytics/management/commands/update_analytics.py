@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from users.models import User
+from analytics import rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild DailyUserSummary and UserProductivity rollups from task history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of users rebuilt per pass'
+        )
+        parser.add_argument(
+            '--user',
+            help='Only rebuild rollups for the user with this uid'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        users = User.objects.order_by('uid').values_list('uid', flat=True)
+        if options['user']:
+            users = users.filter(uid=options['user'])
+
+        user_count = summary_count = productivity_count = 0
+        chunk = []
+        for user_id in users.iterator(chunk_size=chunk_size):
+            chunk.append(user_id)
+            if len(chunk) >= chunk_size:
+                summaries, productivity = rollups.rebuild(chunk)
+                user_count += len(chunk)
+                summary_count += summaries
+                productivity_count += productivity
+                self.stdout.write(f'Rebuilt rollups for {user_count} users...')
+                chunk = []
+
+        if chunk:
+            summaries, productivity = rollups.rebuild(chunk)
+            user_count += len(chunk)
+            summary_count += summaries
+            productivity_count += productivity
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully rebuilt {summary_count} daily summaries and '
+                f'{productivity_count} productivity rows for {user_count} users'
+            )
+        )
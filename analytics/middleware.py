@@ -0,0 +1,16 @@
+from . import rollups
+
+
+class RollupMiddleware:
+    """
+    Coalesce analytics rollup writes per request.
+    Every task created or completed while handling the request adds to an
+    in-memory delta, and the deltas are written once when the response is ready.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with rollups.deferred():
+            return self.get_response(request)
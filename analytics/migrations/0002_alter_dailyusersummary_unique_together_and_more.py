@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-19 12:35
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='dailyusersummary',
+            unique_together={('user', 'date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='userproductivity',
+            unique_together={('user', 'date')},
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-19 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_alter_dailyusersummary_unique_together_and_more'),
+        ('api', '0002_alter_task_recurrence_pattern'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskanalytics',
+            name='task',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='api.task'),
+        ),
+    ]
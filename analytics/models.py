@@ -9,8 +9,11 @@ class UserProductivity(models.Model):
     tasks_completed = models.IntegerField(default=0)
     total_time_spent = models.DurationField(default=timedelta())
 
+    class Meta:
+        unique_together = ['user', 'date']  # One rollup row per user per day
+
 class TaskAnalytics(models.Model):
-    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, related_name='analytics')
     time_to_complete = models.DurationField(null=True, blank=True)
     number_of_edits = models.IntegerField(default=0)
     completed_on_time = models.BooleanField(default=False)
@@ -28,3 +31,5 @@ class DailyUserSummary(models.Model):
     tasks_completed = models.IntegerField(default=0)
     total_time_logged = models.DurationField(default=timedelta())
 
+    class Meta:
+        unique_together = ['user', 'date']  # One rollup row per user per day
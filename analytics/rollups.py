@@ -0,0 +1,206 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.models import Task
+from .models import DailyUserSummary, UserProductivity
+
+logger = logging.getLogger(__name__)
+
+# Pending deltas for the current thread, keyed by (user_id, date)
+_state = threading.local()
+
+
+class RollupDelta:
+    """Counter increments waiting to be applied to one (user, date) rollup row"""
+    __slots__ = ('tasks_created', 'tasks_completed', 'time_spent')
+
+    def __init__(self):
+        self.tasks_created = 0
+        self.tasks_completed = 0
+        self.time_spent = timedelta()
+
+
+def _pending():
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        pending = _state.pending = {}
+    return pending
+
+
+def _add(user_id, day, tasks_created=0, tasks_completed=0, time_spent=None):
+    delta = _pending().setdefault((user_id, day), RollupDelta())
+    delta.tasks_created += tasks_created
+    delta.tasks_completed += tasks_completed
+    if time_spent:
+        delta.time_spent += time_spent
+
+    # Outside a request scope there is nothing to coalesce with, write right away
+    if not getattr(_state, 'depth', 0):
+        flush()
+
+
+def record(user_id, day, **deltas):
+    """
+    Queue rollup increments for a user's day.
+    Deltas only become visible once the surrounding transaction commits,
+    so rolled-back task writes never reach the rollup tables.
+    """
+    transaction.on_commit(lambda: _add(user_id, day, **deltas))
+
+
+def record_task_created(task):
+    record(task.user_id, timezone.localdate(task.created_at), tasks_created=1)
+
+
+def record_task_completed(task):
+    record(
+        task.user_id,
+        timezone.localdate(task.completed_at),
+        tasks_completed=1,
+        time_spent=task.completed_at - task.created_at
+    )
+
+
+def record_task_reopened(task, completed_at):
+    """Undo a completion that was counted on the day of `completed_at`"""
+    if completed_at is None:
+        # Completed without going through save(), so the completion was never counted
+        return
+    record(
+        task.user_id,
+        timezone.localdate(completed_at),
+        tasks_completed=-1,
+        time_spent=task.created_at - completed_at
+    )
+
+
+def flush():
+    """Apply all pending deltas as one upsert pass per rollup table"""
+    pending = _state.__dict__.pop('pending', None)
+    if not pending:
+        return
+
+    completion_keys = [
+        key for key, delta in pending.items()
+        if delta.tasks_completed or delta.time_spent
+    ]
+
+    try:
+        _write(pending, completion_keys)
+    except Exception as e:
+        # Rollups can always be rebuilt with `manage.py update_analytics`,
+        # so a failed flush must never fail the request that triggered it
+        logger.error(f"Error flushing rollup deltas: {str(e)}", exc_info=True)
+        return
+
+    logger.debug(f"Flushed rollup deltas for {len(pending)} user-days")
+
+
+def _write(pending, completion_keys):
+    with transaction.atomic():
+        # Make sure the rows exist, then increment in place with F() so concurrent
+        # writers in other processes never overwrite each other's counts
+        DailyUserSummary.objects.bulk_create(
+            [DailyUserSummary(user_id=user_id, date=day) for user_id, day in pending],
+            ignore_conflicts=True
+        )
+        UserProductivity.objects.bulk_create(
+            [UserProductivity(user_id=user_id, date=day) for user_id, day in completion_keys],
+            ignore_conflicts=True
+        )
+
+        for (user_id, day), delta in pending.items():
+            DailyUserSummary.objects.filter(user_id=user_id, date=day).update(
+                tasks_created=F('tasks_created') + delta.tasks_created,
+                tasks_completed=F('tasks_completed') + delta.tasks_completed,
+                total_time_logged=F('total_time_logged') + delta.time_spent
+            )
+
+        for user_id, day in completion_keys:
+            delta = pending[(user_id, day)]
+            UserProductivity.objects.filter(user_id=user_id, date=day).update(
+                tasks_completed=F('tasks_completed') + delta.tasks_completed,
+                total_time_spent=F('total_time_spent') + delta.time_spent
+            )
+
+
+class deferred:
+    """
+    Context manager that holds rollup writes until the outermost scope exits,
+    so every task touched during a request costs one flush instead of one per save.
+    """
+
+    def __enter__(self):
+        _state.depth = getattr(_state, 'depth', 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _state.depth -= 1
+        if not _state.depth:
+            flush()
+        return False
+
+
+def rebuild(user_ids, batch_size=1000):
+    """
+    Recompute rollup rows for the given users from Task history.
+    Created counts come from Task.created_at, completions from Task.completed_at,
+    both aggregated in the database.
+    """
+    tasks = Task.objects.filter(user_id__in=user_ids).order_by()
+
+    created = (
+        tasks.annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day')
+        .annotate(count=Count('uid'))
+    )
+    completed = (
+        tasks.filter(completed=True, completed_at__isnull=False)
+        .annotate(day=TruncDate('completed_at'))
+        .values('user_id', 'day')
+        .annotate(
+            count=Count('uid'),
+            time_spent=Sum(ExpressionWrapper(
+                F('completed_at') - F('created_at'),
+                output_field=DurationField()
+            ))
+        )
+    )
+
+    summaries = {}
+    for row in created:
+        summary = summaries.setdefault(
+            (row['user_id'], row['day']),
+            DailyUserSummary(user_id=row['user_id'], date=row['day'])
+        )
+        summary.tasks_created = row['count']
+
+    productivity = []
+    for row in completed:
+        time_spent = row['time_spent'] or timedelta()
+        summary = summaries.setdefault(
+            (row['user_id'], row['day']),
+            DailyUserSummary(user_id=row['user_id'], date=row['day'])
+        )
+        summary.tasks_completed = row['count']
+        summary.total_time_logged = time_spent
+        productivity.append(UserProductivity(
+            user_id=row['user_id'],
+            date=row['day'],
+            tasks_completed=row['count'],
+            total_time_spent=time_spent
+        ))
+
+    with transaction.atomic():
+        DailyUserSummary.objects.filter(user_id__in=user_ids).delete()
+        UserProductivity.objects.filter(user_id__in=user_ids).delete()
+        DailyUserSummary.objects.bulk_create(summaries.values(), batch_size=batch_size)
+        UserProductivity.objects.bulk_create(productivity, batch_size=batch_size)
+
+    return len(summaries), len(productivity)
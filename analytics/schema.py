@@ -0,0 +1,67 @@
+from functools import cached_property
+
+import graphene
+from graphene.types.generic import GenericScalar
+from graphene_django import DjangoObjectType
+
+from django.utils import timezone
+
+from api.schema import current_user
+from users.timezones import user_zone
+from . import engine
+from .models import DailyUserSummary
+
+
+class DailySummaryType(DjangoObjectType):
+    class Meta:
+        model = DailyUserSummary
+        fields = ('date', 'tasks_created', 'tasks_completed', 'total_time_logged')
+
+
+class StreaksType(graphene.ObjectType):
+    current_streak = graphene.Int(required=True)
+    longest_streak = graphene.Int(required=True)
+    active_days = graphene.Int(required=True)
+    total_tasks = graphene.Int(required=True)
+    completed_tasks = graphene.Int(required=True)
+    on_time_rate = graphene.Float(required=True)
+
+
+class Analytics:
+    """Root value for AnalyticsType; the engine's metrics are fetched once per request"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def metrics(self):
+        return engine.productivity_metrics(self.user)
+
+
+class AnalyticsType(graphene.ObjectType):
+    daily_summary = graphene.Field(DailySummaryType, required=True)
+    streaks = graphene.Field(StreaksType, required=True)
+    trend = GenericScalar(required=True)
+    heatmap = GenericScalar(required=True)
+
+    def resolve_daily_summary(self, info):
+        today = timezone.localdate(timezone=user_zone(self.user.pk))
+        summary = DailyUserSummary.objects.filter(user=self.user, date=today).first()
+        # Nothing recorded yet today reports zeros without writing a row
+        return summary or DailyUserSummary(user=self.user, date=today)
+
+    def resolve_streaks(self, info):
+        return StreaksType(**self.metrics['streaks'])
+
+    def resolve_trend(self, info):
+        return self.metrics['trend']
+
+    def resolve_heatmap(self, info):
+        return self.metrics['heatmap']
+
+
+class Query(graphene.ObjectType):
+    analytics = graphene.Field(AnalyticsType, required=True)
+
+    def resolve_analytics(self, info):
+        return Analytics(current_user(info))
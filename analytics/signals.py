@@ -0,0 +1,68 @@
+import logging
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from api.models import Task
+from api.scheduling import base_reminder_datetime
+from monitoring.metrics import timed_signal_handler
+from . import rollups
+from .writer import writer
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_init, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    """Keep the loaded completion state so post_save can detect transitions"""
+    # Read from __dict__ so deferred fields are never fetched just for this
+    instance._analytics_completed = instance.__dict__.get('completed')
+    instance._analytics_completed_at = instance.__dict__.get('completed_at')
+
+
+@receiver(post_save, sender=Task)
+@timed_signal_handler
+def update_task_rollups(sender, instance, created, raw=False, **kwargs):
+    """Feed task creations and completions into the daily rollups"""
+    if raw:
+        return
+
+    was_completed = getattr(instance, '_analytics_completed', None)
+
+    if created:
+        rollups.record_task_created(instance)
+
+    if instance.completed and (created or was_completed is False):
+        rollups.record_task_completed(instance)
+    elif not instance.completed and was_completed:
+        rollups.record_task_reopened(instance, instance._analytics_completed_at)
+
+
+@receiver(post_save, sender=Task)
+@timed_signal_handler
+def update_task_analytics(sender, instance, created, raw=False, **kwargs):
+    """Feed edits and completions into the buffered TaskAnalytics writer"""
+    if raw:
+        return
+
+    was_completed = getattr(instance, '_analytics_completed', None)
+
+    # Tasks created already completed count as completed at creation
+    if instance.completed and (created or was_completed is False):
+        deadline = base_reminder_datetime(instance)
+        writer.record_completion(
+            instance.uid,
+            time_to_complete=instance.completed_at - instance.created_at,
+            completed_on_time=instance.completed_at <= deadline
+        )
+    elif created:
+        return
+    elif not instance.completed and was_completed:
+        writer.record_reopened(instance.uid)
+    else:
+        writer.record_edit(instance.uid)
+
+
+@receiver(post_save, sender=Task)
+def remember_saved_task_state(sender, instance, **kwargs):
+    """Refresh the snapshot once every handler has seen this save"""
+    instance._analytics_completed = instance.completed
+    instance._analytics_completed_at = instance.completed_at
@@ -1,3 +1,160 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import Task
+from users.models import User
+
+from . import engine, rollups
+from .models import DailyUserSummary, TaskAnalytics
+from .writer import TaskAnalyticsDelta, TaskAnalyticsWriter, writer
+
+
+def make_user(email='ada@example.com'):
+    return User.objects.create_user(username=email.split('@')[0], email=email, password='pw12345!')
+
+
+def make_task(user=None):
+    return Task.objects.create(
+        user=user or make_user(),
+        title='Write report',
+        description='Quarterly numbers',
+        due_date=timezone.localdate() + timedelta(days=2),
+        time=time(9, 30)
+    )
+
+
+def edits(count):
+    delta = TaskAnalyticsDelta()
+    delta.edits = count
+    return delta
+
+
+class SignalTestCase(TestCase):
+    """Publishes to a mock instead of Redis and writes task analytics inline, not from a thread"""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch('api.redis_pool._client', mock.MagicMock()),
+            mock.patch.object(writer, 'interval', 0)
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class RollupTests(SignalTestCase):
+    def test_tasks_saved_in_one_scope_are_written_with_one_update(self):
+        user = make_user()
+        with CaptureQueriesContext(connection) as queries, rollups.deferred():
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(3):
+                    make_task(user)
+
+        summary = DailyUserSummary.objects.get(user=user)
+        self.assertEqual(summary.tasks_created, 3)
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "analytics_dailyusersummary"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_rolled_back_tasks_are_not_counted(self):
+        user = make_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_task(user)
+            try:
+                with transaction.atomic():
+                    make_task(user)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(DailyUserSummary.objects.get(user=user).tasks_created, 1)
+
+    def test_reopening_undoes_the_completion_on_its_own_day(self):
+        task = make_task()
+        completed_on = timezone.now() - timedelta(days=2)
+        for moment, change in (
+            (completed_on, {'completed': True}),
+            (completed_on + timedelta(days=1), {'title': 'Edited after completion'}),
+            (timezone.now(), {'completed': False})
+        ):
+            with mock.patch('django.utils.timezone.now', return_value=moment), \
+                    self.captureOnCommitCallbacks(execute=True):
+                for field, value in change.items():
+                    setattr(task, field, value)
+                task.save()
+
+        summaries = DailyUserSummary.objects.filter(user=task.user)
+        self.assertEqual(
+            {summary.date: summary.tasks_completed for summary in summaries if summary.tasks_completed},
+            {}
+        )
+        self.assertEqual(summaries.get(date=timezone.localdate(completed_on)).total_time_logged, timedelta())
+
+
+class TaskAnalyticsWriterTests(SignalTestCase):
+    def test_concurrent_flushes_for_a_task_add_up(self):
+        task = make_task()
+        first, second = TaskAnalyticsWriter(0), TaskAnalyticsWriter(0)
+        bulk_create = TaskAnalytics.objects.bulk_create
+
+        def flush_second_first(*args, **kwargs):
+            # Another process flushes between this one's read and its write
+            with mock.patch.object(TaskAnalytics.objects, 'bulk_create', bulk_create):
+                second._write({task.uid: edits(1)})
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(TaskAnalytics.objects, 'bulk_create', flush_second_first):
+            first._write({task.uid: edits(2)})
+
+        self.assertEqual(TaskAnalytics.objects.get(task=task).number_of_edits, 3)
+
+    def test_tasks_created_completed_record_their_completion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(
+                user=make_user(),
+                title='Filed already',
+                description='Logged after the fact',
+                due_date=timezone.localdate() + timedelta(days=2),
+                time=time(9, 30),
+                completed=True
+            )
+
+        analytics = TaskAnalytics.objects.get(task=task)
+        self.assertEqual(analytics.time_to_complete, task.completed_at - task.created_at)
+        self.assertTrue(analytics.completed_on_time)
+        self.assertEqual(analytics.number_of_edits, 0)
+
+
+class ProductivityEngineTests(TestCase):
+    def test_heatmap_uses_the_users_offset_on_each_side_of_dst(self):
+        user = make_user()
+        user.profile.timezone = 'America/New_York'
+        user.profile.save()
+        # 22:00 EST on Saturday 28 February, 23:00 EDT on Tuesday 30 June
+        for completed_at in (
+            datetime(2026, 3, 1, 3, tzinfo=dt_timezone.utc),
+            datetime(2026, 7, 1, 3, tzinfo=dt_timezone.utc)
+        ):
+            task = make_task(user)
+            Task.objects.filter(pk=task.pk).update(completed=True, updated_at=completed_at)
+
+        counts = engine.compute(user)['heatmap']['counts']
+
+        self.assertEqual(counts[5][22], 1)
+        self.assertEqual(counts[1][23], 1)
+        self.assertEqual(sum(map(sum, counts)), 2)
+
+    def test_local_seconds_match_each_moments_own_offset(self):
+        zone = ZoneInfo('America/New_York')
+        # Around the 2026 spring-forward (07:00 UTC on 8 March) and fall-back (06:00 UTC on 1 November)
+        spring = datetime(2026, 3, 8, 7, tzinfo=dt_timezone.utc)
+        fall = datetime(2026, 11, 1, 6, tzinfo=dt_timezone.utc)
+        moments = [edge + timedelta(seconds=step) for edge in (spring, fall) for step in (-3601, -1, 0, 1, 3600)]
+        moments.append(datetime(2019, 6, 1, tzinfo=dt_timezone.utc))
 
-# Create your tests here.
+        expected = [moment.timestamp() + moment.astimezone(zone).utcoffset().total_seconds() for moment in moments]
+        self.assertEqual(engine.local_seconds(moments, zone, len(moments)).tolist(), expected)
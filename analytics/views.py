@@ -1,11 +1,12 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Avg, Count, Sum
+from django.db.models import Avg, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from .models import UserProductivity, TaskAnalytics, CategoryPerformance, DailyUserSummary
 from .serializers import UserProductivitySerializer, TaskAnalyticsSerializer, CategoryPerformanceSerializer, DailyUserSummarySerializer
+from . import engine
 from api.models import Task, Category
 
 class AnalyticsViewSet(viewsets.ViewSet):
@@ -15,7 +16,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     def user_productivity(self, request):
         user = request.user
         last_30_days = timezone.now().date() - timedelta(days=30)
-        productivity = UserProductivity.objects.filter(user=user, date__gte=last_30_days)
+        productivity = UserProductivity.objects.filter(user=user, date__gte=last_30_days).order_by('date')
         serializer = UserProductivitySerializer(productivity, many=True)
         return Response(serializer.data)
 
@@ -30,25 +31,28 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['GET'])
     def category_performance(self, request):
         user = request.user
-        categories = Category.objects.filter(user=user)
-        performance = []
-        for category in categories:
-            total_tasks = Task.objects.filter(category=category).count()
-            completed_tasks = Task.objects.filter(category=category, completed=True).count()
-            avg_completion_time = TaskAnalytics.objects.filter(task__category=category).aggregate(Avg('time_to_complete'))['time_to_complete__avg']
-            performance.append({
-                'category': category.name,
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'average_completion_time': avg_completion_time
-            })
+        # TaskAnalytics is one-to-one with Task, so joining it does not inflate the counts
+        categories = Category.objects.filter(user=user).annotate(
+            total_tasks=Count('task'),
+            completed_tasks=Count('task', filter=Q(task__completed=True)),
+            average_completion_time=Avg('task__analytics__time_to_complete')
+        )
+        performance = [{
+            'category': category.name,
+            'total_tasks': category.total_tasks,
+            'completed_tasks': category.completed_tasks,
+            'average_completion_time': category.average_completion_time
+        } for category in categories]
         return Response(performance)
 
     @action(detail=False, methods=['GET'])
     def daily_summary(self, request):
         user = request.user
         today = timezone.now().date()
-        summary, created = DailyUserSummary.objects.get_or_create(user=user, date=today)
+        summary = DailyUserSummary.objects.filter(user=user, date=today).first()
+        if summary is None:
+            # Nothing recorded yet today, report zeros without writing a row
+            summary = DailyUserSummary(user=user, date=today)
         serializer = DailyUserSummarySerializer(summary)
         return Response(serializer.data)
 
@@ -56,12 +60,27 @@ class AnalyticsViewSet(viewsets.ViewSet):
     def productivity_trend(self, request):
         user = request.user
         last_30_days = timezone.now().date() - timedelta(days=30)
-        trend = UserProductivity.objects.filter(user=user, date__gte=last_30_days).values('date').annotate(
-            tasks_completed=Sum('tasks_completed'),
-            total_time_spent=Sum('total_time_spent')
+        # Rollups hold one row per user per day, so no aggregation is needed
+        trend = UserProductivity.objects.filter(user=user, date__gte=last_30_days).values(
+            'date', 'tasks_completed', 'total_time_spent'
         ).order_by('date')
         return Response(list(trend))
 
+    @action(detail=False, methods=['GET'])
+    def completion_streaks(self, request):
+        """Current and longest run of days with at least one completed task"""
+        return Response(engine.productivity_metrics(request.user)['streaks'])
+
+    @action(detail=False, methods=['GET'])
+    def completion_trend(self, request):
+        """Daily completions over the last 90 days with 7 and 30 day moving averages"""
+        return Response(engine.productivity_metrics(request.user)['trend'])
+
+    @action(detail=False, methods=['GET'])
+    def activity_heatmap(self, request):
+        """Completions bucketed by weekday and hour of day"""
+        return Response(engine.productivity_metrics(request.user)['heatmap'])
+
 class TaskAnalyticsViewSet(viewsets.ModelViewSet):
     queryset = TaskAnalytics.objects.all()
     serializer_class = TaskAnalyticsSerializer
@@ -0,0 +1,135 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from api.models import Task
+from .models import TaskAnalytics
+
+logger = logging.getLogger(__name__)
+
+
+class TaskAnalyticsDelta:
+    """Aggregated changes for one task since the last flush"""
+    __slots__ = ('edits', 'completion')
+
+    def __init__(self):
+        self.edits = 0
+        # None means "unchanged", otherwise a (time_to_complete, completed_on_time) pair
+        self.completion = None
+
+
+class TaskAnalyticsWriter:
+    """
+    In-process buffer in front of the TaskAnalytics table.
+
+    Task signals record edits and completions here once their transaction commits.
+    Deltas for the same task are merged, and the whole buffer is written in one
+    transaction, either on every commit (interval 0) or from a background thread
+    every `interval_ms` milliseconds. Edit counts are incremented in SQL, so
+    processes flushing the same task add up rather than overwrite each other.
+    """
+
+    def __init__(self, interval_ms):
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        self._pid = None
+
+    def record_edit(self, task_id):
+        transaction.on_commit(lambda: self._add(task_id, edits=1))
+
+    def record_completion(self, task_id, time_to_complete, completed_on_time):
+        transaction.on_commit(
+            lambda: self._add(task_id, completion=(time_to_complete, completed_on_time))
+        )
+
+    def record_reopened(self, task_id):
+        transaction.on_commit(lambda: self._add(task_id, completion=(None, False)))
+
+    def _add(self, task_id, edits=0, completion=None):
+        with self._lock:
+            delta = self._pending.setdefault(task_id, TaskAnalyticsDelta())
+            delta.edits += edits
+            if completion is not None:
+                delta.completion = completion
+
+        if self.interval:
+            self._ensure_thread()
+        else:
+            self.flush()
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so a gunicorn worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='task-analytics-writer',
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+    def flush(self):
+        """Write all buffered deltas; returns the number of tasks written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            return self._write(pending)
+        except Exception as e:
+            logger.error(f"Error flushing task analytics: {str(e)}", exc_info=True)
+            return 0
+
+    def _write(self, pending):
+        # Tasks deleted before the flush are skipped
+        existing = set(Task.objects.filter(uid__in=list(pending)).values_list('uid', flat=True))
+
+        # Tasks with identical deltas (typically a single edit) share one UPDATE
+        groups = defaultdict(list)
+        for task_id, delta in pending.items():
+            if task_id in existing:
+                groups[(delta.edits, delta.completion)].append(task_id)
+
+        with transaction.atomic():
+            # Make sure the rows exist, then increment in place with F() so concurrent
+            # flushes in other processes never overwrite each other's counts
+            TaskAnalytics.objects.bulk_create(
+                [TaskAnalytics(task_id=task_id) for task_ids in groups.values() for task_id in task_ids],
+                ignore_conflicts=True
+            )
+            for (edits, completion), task_ids in groups.items():
+                changes = {'number_of_edits': F('number_of_edits') + edits}
+                if completion is not None:
+                    time_to_complete, completed_on_time = completion
+                    changes.update(time_to_complete=time_to_complete, completed_on_time=bool(completed_on_time))
+                TaskAnalytics.objects.filter(task_id__in=task_ids).update(**changes)
+
+        written = sum(len(task_ids) for task_ids in groups.values())
+        logger.debug(f"Flushed analytics for {written} tasks")
+        return written
+
+
+writer = TaskAnalyticsWriter(getattr(settings, 'ANALYTICS_FLUSH_INTERVAL_MS', 500))
+atexit.register(writer.flush)
@@ -1,42 +1,9 @@
-import json
-import sys
 from django.contrib import admin
-import redis
-from .models import Category, Task, Reminder, QuoteSchedule
+from .models import Category, Task, Reminder, QuoteSchedule, SpilledEvent
 from unfold.admin import ModelAdmin
-from .utils import publish_to_redis  # Import the standalone function
-from config.settings import REDIS_URL, REDIS_PORT, REDIS_PASSWORD, PORT
 import logging
 
-# Configure logging
 logger = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.StreamHandler(sys.stderr)
-    ]
-)
-
-if not PORT:
-    PORT = "8080"
-    print("PORT was empty. Defaulting to 8080.", flush=True)
-    logger.info("PORT was empty. Set to default: 8080.")
-
-try:
-    redis_client = redis.Redis(
-        host=REDIS_URL, 
-        port=REDIS_PORT, 
-        db=0, 
-        password=REDIS_PASSWORD  # Add the password here
-    )
-    redis_client.ping()
-    print("Redis connection successful", flush=True)
-    logger.info("Redis connection established")
-except Exception as e:
-    print(f"Redis connection failed: {e}", flush=True)
-    logger.error(f"Redis connection error: {e}")
 
 @admin.register(Category)
 class CategoryAdmin(ModelAdmin):
@@ -70,6 +37,19 @@ class ReminderAdmin(ModelAdmin):
 
 @admin.register(QuoteSchedule)
 class QuoteScheduleAdmin(ModelAdmin):
-    list_display = ('user', 'scheduled_time', 'is_active')
+    list_display = ('user', 'scheduled_time', 'utc_minute', 'is_active', 'last_sent_on')
     list_filter = ('is_active', 'scheduled_time')
     search_fields = ('user__username',)
+
+
+@admin.register(SpilledEvent)
+class SpilledEventAdmin(ModelAdmin):
+    list_display = ('id', 'stream', 'action', 'created_at')
+    list_filter = ('stream', 'created_at')
+    readonly_fields = ('stream', 'fields', 'created_at')
+
+    def has_add_permission(self, request):
+        return False  # Only spilled by the publisher while Redis is down
+
+    def action(self, obj):
+        return obj.fields.get('action', '')
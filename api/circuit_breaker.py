@@ -0,0 +1,68 @@
+import logging
+import threading
+import time
+
+from monitoring.metrics import CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """
+    Fail fast on a dependency that keeps failing.
+
+    Closed: calls go through; `failure_threshold` consecutive failures open the breaker.
+    Open: calls are refused without being attempted for `reset_timeout` seconds.
+    Half-open: a single probe call is let through; success closes the breaker,
+    failure opens it again for another `reset_timeout`.
+
+    State is per process. Every transition is exported as a metric.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        CIRCUIT_BREAKER_STATE.labels(breaker=name).set(STATE_VALUES[CLOSED])
+
+    def allow(self):
+        """Whether a call may be attempted now; in half-open only the probe gets True"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+                return True
+            return False
+
+    def record_success(self):
+        """Returns True when this success closed a previously tripped breaker"""
+        with self._lock:
+            self._failures = 0
+            if self.state == CLOSED:
+                return False
+            self._transition(CLOSED)
+            return True
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def _transition(self, state):
+        logger.warning(f"Circuit breaker '{self.name}' {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(breaker=self.name).set(STATE_VALUES[state])
+        CIRCUIT_BREAKER_TRANSITIONS.labels(breaker=self.name, state=state).inc()
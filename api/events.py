@@ -0,0 +1,134 @@
+"""
+Request-scoped coalescing of reminder stream events.
+
+A single request often produces several events for one reminder: the
+post_save signal announces 'scheduled' and then the view announces
+'rescheduled' for the same save. Events are queued with transaction.on_commit,
+so writes that roll back never publish anything. Committed events are merged
+per reminder, and the final state of each reminder is built into messages when
+the request finishes, or as soon as the transaction commits outside a request
+scope. A Celery task (api.tasks.publish_events) then adds the batch to the
+stream in one pipelined round trip.
+"""
+import logging
+import threading
+
+from django.db import transaction
+
+from users.models import User
+from .models import Reminder, Task
+from .stream import REMINDER_STREAM
+from .utils import access_token_for, build_reminder_message
+
+logger = logging.getLogger(__name__)
+
+# Actions that only say "something changed"; they never replace a more specific pending action
+GENERIC_ACTIONS = {'scheduled', 'updated'}
+
+# Pending events for the current thread: reminder uid -> [reminder, action]
+_state = threading.local()
+
+
+def merge(previous, action):
+    """
+    Action to publish when `action` follows `previous` for the same reminder.
+    None means the reminder needs no event at all.
+    """
+    if previous is None:
+        return action
+    if action in GENERIC_ACTIONS and previous not in GENERIC_ACTIONS:
+        return previous
+    if previous == 'created':
+        # Consumers have not seen the reminder yet, so it is still new, just with its final state
+        if action == 'cancelled':
+            return None
+        if action == 'rescheduled':
+            return 'created'
+    return action
+
+
+def queue(reminder, action):
+    """Publish an event for `reminder` once the surrounding transaction commits"""
+    transaction.on_commit(lambda: _add(reminder, action))
+
+
+def _pending():
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        pending = _state.pending = {}
+    return pending
+
+
+def _add(reminder, action):
+    pending = _pending()
+    if reminder.uid in pending:
+        entry = pending[reminder.uid]
+        # Keep the newest instance, it carries the final state
+        entry[0] = reminder
+        entry[1] = merge(entry[1], action)
+    else:
+        pending[reminder.uid] = [reminder, action]
+
+    if not getattr(_state, 'depth', 0):
+        flush()
+
+
+def flush():
+    """Publish the pending events, one message per reminder, in one round trip"""
+    pending = _state.__dict__.pop('pending', None)
+    if not pending:
+        return
+
+    entries = [(reminder, action) for reminder, action in pending.values() if action is not None]
+    try:
+        _attach_related([reminder for reminder, _ in entries])
+        # Tokens are signed per user, so a batch for one user signs once
+        tokens = {}
+        messages = []
+        for reminder, action in entries:
+            if reminder.user_id not in tokens:
+                tokens[reminder.user_id] = access_token_for(reminder.user)
+            messages.append(build_reminder_message(reminder, action, tokens[reminder.user_id]))
+        # Imported here, the tasks module queues events itself
+        from .tasks import publish_events
+        publish_events.delay(REMINDER_STREAM, messages)
+    except Exception as e:
+        # The writes are committed, an event failure must not fail the request
+        logger.error(f"Error publishing reminder events: {str(e)}", exc_info=True)
+        return
+
+    logger.debug(f"Queued {len(messages)} coalesced reminder events ({len(pending)} reminders touched)")
+
+
+def _attach_related(reminders):
+    """Load the users and tasks messages need with one query each instead of one per reminder"""
+    for field, model in (('user', User), ('task', Task)):
+        descriptor = getattr(Reminder, field)
+        missing = {
+            getattr(reminder, f'{field}_id') for reminder in reminders
+            if not descriptor.is_cached(reminder)
+        }
+        if not missing:
+            continue
+        loaded = model.objects.in_bulk(missing)
+        for reminder in reminders:
+            related = loaded.get(getattr(reminder, f'{field}_id'))
+            if related is not None and not descriptor.is_cached(reminder):
+                setattr(reminder, field, related)
+
+
+class deferred:
+    """
+    Context manager that holds committed events until the outermost scope exits,
+    so every reminder touched during a request is published once.
+    """
+
+    def __enter__(self):
+        _state.depth = getattr(_state, 'depth', 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _state.depth -= 1
+        if not _state.depth:
+            flush()
+        return False
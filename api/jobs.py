@@ -0,0 +1,75 @@
+"""
+Commit-safe, per-user batching of Celery tasks.
+
+Signal handlers call `enqueue(task, user_id, *items)` instead of doing their work
+inline. As with api.events, items are added with transaction.on_commit, so writes
+that roll back never dispatch anything. Items committed for the same task and
+user are merged into a single `task.delay(user_id, items)`. The calls are sent
+when the request finishes, or as soon as the transaction commits outside a
+request scope. With CELERY_TASK_ALWAYS_EAGER the task runs right there, in the
+calling process.
+
+Tasks take (user_id, items) and must be idempotent. The same items can arrive
+again from a retry, a redelivery or a concurrent request.
+"""
+import logging
+import threading
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Pending calls for the current thread: (task name, user id) -> [task, {item: None}]
+_state = threading.local()
+
+
+def enqueue(task, user_id, *items):
+    """Call `task` for `user_id` with `items` once the surrounding transaction commits"""
+    transaction.on_commit(lambda: _add(task, str(user_id), items))
+
+
+def _pending():
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        pending = _state.pending = {}
+    return pending
+
+
+def _add(task, user_id, items):
+    entry = _pending().setdefault((task.name, user_id), [task, {}])
+    # A dict keeps the first-seen order while dropping repeats
+    entry[1].update(dict.fromkeys(items))
+
+    if not getattr(_state, 'depth', 0):
+        flush()
+
+
+def flush():
+    """Send one call per task and user"""
+    pending = _state.__dict__.pop('pending', None)
+    if not pending:
+        return
+
+    for (name, user_id), (task, items) in pending.items():
+        try:
+            task.delay(user_id, list(items))
+        except Exception as e:
+            # The writes are committed, a broker failure must not fail the request
+            logger.error(f"Error dispatching {name} for user {user_id}: {str(e)}", exc_info=True)
+
+
+class deferred:
+    """
+    Context manager that holds committed jobs until the outermost scope exits,
+    so every task a request saves for one user is handled by one call.
+    """
+
+    def __enter__(self):
+        _state.depth = getattr(_state, 'depth', 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _state.depth -= 1
+        if not _state.depth:
+            flush()
+        return False
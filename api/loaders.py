@@ -0,0 +1,143 @@
+"""
+Per-request batching loaders for the GraphQL schema.
+
+graphql-core resolves fields depth first, so a list of N tasks asking for their
+category and reminders would otherwise issue 2N queries. Resolvers that return
+a list `prime` the loaders with the keys their items will ask for. The first
+`load` for any of those keys then fetches every primed key in one query, and
+later loads are cache hits. Priming is free: if no child field asks, nothing is
+fetched. Loaders live on the request, so nothing is shared between users or
+requests.
+"""
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Category, Reminder, Task
+
+
+class Loader(ABC):
+    """Batch-load values by key, once per key per request"""
+
+    def __init__(self, loaders):
+        self.loaders = loaders
+        self.user = loaders.user
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, keys):
+        """Queue keys to be fetched with the next batch"""
+        self._pending.update(key for key in keys if key is not None and key not in self._cache)
+
+    def add(self, key, value):
+        """Cache a value that was loaded some other way"""
+        self._cache.setdefault(key, value)
+        self._pending.discard(key)
+
+    def load(self, key):
+        if key is None:
+            return self.default_value()
+        if key not in self._cache:
+            self._pending.add(key)
+            keys, self._pending = self._pending, set()
+            found = self.batch_load(list(keys))
+            for k in keys:
+                self._cache[k] = found.get(k, self.default_value())
+        return self._cache[key]
+
+    def default_value(self):
+        """Value for keys the batch did not return"""
+        return None
+
+    @abstractmethod
+    def batch_load(self, keys):
+        """Return {key: value} for `keys`; keys missing from the result get the default"""
+
+
+class CategoryLoader(Loader):
+    def batch_load(self, keys):
+        categories = Category.objects.filter(user=self.user).in_bulk(keys)
+        self.loaders.saw_categories(categories.values())
+        return categories
+
+
+class TaskLoader(Loader):
+    def batch_load(self, keys):
+        tasks = Task.objects.filter(user=self.user).in_bulk(keys)
+        self.loaders.saw_tasks(tasks.values())
+        return tasks
+
+
+class RemindersByTaskLoader(Loader):
+    """
+    Each task's first GRAPHQL_MAX_LIST_SIZE reminders by time, the most any
+    `reminders(limit:)` can return; resolvers slice them down to their limit.
+    """
+
+    def default_value(self):
+        return []
+
+    def batch_load(self, keys):
+        reminders = (
+            Reminder.objects.filter(user=self.user, task_id__in=keys)
+            .annotate(position=Window(
+                RowNumber(), partition_by=F('task_id'), order_by=[F('reminder_datetime').asc(), F('uid').asc()]
+            ))
+            .filter(position__lte=settings.GRAPHQL_MAX_LIST_SIZE)
+            .order_by('reminder_datetime', 'uid')
+        )
+        grouped = defaultdict(list)
+        for reminder in reminders:
+            grouped[reminder.task_id].append(reminder)
+        return grouped
+
+
+class CategoryStatsLoader(Loader):
+    """{'total_tasks', 'active_tasks', 'completed_tasks'} per category id"""
+
+    def default_value(self):
+        return {'total_tasks': 0, 'active_tasks': 0, 'completed_tasks': 0}
+
+    def batch_load(self, keys):
+        rows = (
+            Task.objects.filter(user=self.user, category_id__in=keys)
+            .order_by()
+            .values('category_id')
+            .annotate(
+                total_tasks=Count('uid'),
+                active_tasks=Count('uid', filter=Q(completed=False)),
+                completed_tasks=Count('uid', filter=Q(completed=True))
+            )
+        )
+        return {row.pop('category_id'): row for row in rows}
+
+
+class Loaders:
+    """The loaders for one request, with helpers that prime them from loaded rows"""
+
+    def __init__(self, user):
+        self.user = user
+        self.categories = CategoryLoader(self)
+        self.tasks = TaskLoader(self)
+        self.reminders_by_task = RemindersByTaskLoader(self)
+        self.category_stats = CategoryStatsLoader(self)
+
+    def saw_tasks(self, tasks):
+        for task in tasks:
+            self.tasks.add(task.pk, task)
+        self.categories.prime(task.category_id for task in tasks)
+        self.reminders_by_task.prime(task.pk for task in tasks)
+        return tasks
+
+    def saw_reminders(self, reminders):
+        self.tasks.prime(reminder.task_id for reminder in reminders)
+        return reminders
+
+    def saw_categories(self, categories):
+        for category in categories:
+            self.categories.add(category.pk, category)
+        self.category_stats.prime(category.pk for category in categories)
+        return categories
@@ -0,0 +1,108 @@
+from django.core.management.base import BaseCommand
+from redis.exceptions import ResponseError
+
+from api.redis_pool import get_redis
+from api.stream import REMINDER_STREAM
+
+
+def parse_id(stream_id):
+    if isinstance(stream_id, bytes):
+        stream_id = stream_id.decode()
+    ms, _, seq = stream_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete events superseded by a later event for the same reminder from the '
+        'reminders stream, and report the stream\'s memory use'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stream', default=REMINDER_STREAM, help='Stream key to compact')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Entries read and deleted per round trip')
+        parser.add_argument('--dry-run', action='store_true', help='Count superseded events without deleting them')
+        parser.add_argument('--report-only', action='store_true', help='Only print the memory report')
+
+    def handle(self, *args, **options):
+        client = get_redis()
+        stream = options['stream']
+
+        try:
+            self.report(client, stream, 'Before')
+        except ResponseError:
+            self.stdout.write(f"Stream '{stream}' does not exist")
+            return
+        if options['report_only']:
+            return
+
+        limit = self.compaction_limit(client, stream)
+        scanned, reminders, superseded = self.compact(client, stream, limit, options['batch_size'], options['dry_run'])
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {superseded} superseded events; scanned {scanned} entries for {reminders} reminders'
+        ))
+        if not options['dry_run']:
+            self.report(client, stream, 'After')
+
+    def report(self, client, stream, label):
+        info = client.xinfo_stream(stream)
+        memory = client.memory_usage(stream, samples=0) or 0
+        length = info['length']
+        self.stdout.write(
+            f"{label}: {length} entries, {memory / 1024:.1f} KiB "
+            f"({memory / length if length else 0:.0f} bytes/entry), "
+            f"{info['radix-tree-nodes']} radix tree nodes, {info['groups']} consumer groups"
+        )
+
+    def compaction_limit(self, client, stream):
+        """
+        Exclusive upper bound on ids that are safe to delete: every consumer group
+        has read them and none of them is waiting for an acknowledgement. Deleting
+        a pending entry would leave consumers with an empty message on retry.
+        """
+        limit = None
+        for group in client.xinfo_groups(stream):
+            ms, seq = parse_id(group['last-delivered-id'])
+            bound = (ms, seq + 1)
+            if group['pending']:
+                pending = client.xpending(stream, group['name'])
+                bound = min(bound, parse_id(pending['min']))
+            limit = bound if limit is None else min(limit, bound)
+        return limit
+
+    def compact(self, client, stream, limit, batch_size, dry_run):
+        # Newest entry id seen per reminder; an older entry for the same reminder is superseded
+        latest = {}
+        doomed = []
+        scanned = superseded = 0
+        start = '-'
+
+        while True:
+            entries = client.xrange(stream, min=start, max='+', count=batch_size)
+            if not entries:
+                break
+            for entry_id, fields in entries:
+                scanned += 1
+                reminder_id = fields.get(b'reminder_id')
+                if reminder_id is None:
+                    continue
+                previous = latest.get(reminder_id)
+                latest[reminder_id] = entry_id
+                if previous is not None and (limit is None or parse_id(previous) < limit):
+                    doomed.append(previous)
+
+            if len(doomed) >= batch_size:
+                superseded += self.delete(client, stream, doomed, dry_run)
+                doomed = []
+            start = f'({entries[-1][0].decode()}'
+
+        if doomed:
+            superseded += self.delete(client, stream, doomed, dry_run)
+        return scanned, len(latest), superseded
+
+    def delete(self, client, stream, entry_ids, dry_run):
+        if dry_run:
+            return len(entry_ids)
+        return client.xdel(stream, *entry_ids)
@@ -0,0 +1,64 @@
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.quotes import dispatch, refresh_utc_minutes
+
+
+class Command(BaseCommand):
+    help = 'Publish daily quotes to the quotes stream for every schedule due each minute'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Dispatch the current minute and exit')
+        parser.add_argument('--at', help='Dispatch the bucket for this UTC time (HH:MM) today and exit')
+        parser.add_argument('--catch-up', type=int, default=None, help='Also send missed buckets from this many minutes back')
+        parser.add_argument('--batch-size', type=int, default=None, help='Events per Redis pipeline')
+
+    def handle(self, *args, **options):
+        self.catch_up = options['catch_up']
+        self.batch_size = options['batch_size']
+
+        if options['at']:
+            try:
+                at = datetime.strptime(options['at'], '%H:%M').time()
+            except ValueError:
+                raise CommandError('--at must be a UTC time as HH:MM')
+            now = datetime.combine(timezone.now().astimezone(dt_timezone.utc).date(), at, tzinfo=dt_timezone.utc)
+            self.tick(now, refresh=True)
+            return
+
+        if options['once']:
+            self.tick(timezone.now(), refresh=True)
+            return
+
+        self.stdout.write('Dispatching quotes every minute, press Ctrl+C to stop')
+        refreshed_hour = None
+        try:
+            while True:
+                now = timezone.now()
+                # Offsets only change on the hour (DST) or when a profile is edited
+                hour = now.replace(minute=0, second=0, microsecond=0)
+                self.tick(now, refresh=hour != refreshed_hour)
+                refreshed_hour = hour
+                next_minute = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+                time.sleep(max(0, (next_minute - timezone.now()).total_seconds()))
+        except KeyboardInterrupt:
+            pass
+
+    def tick(self, now, refresh):
+        close_old_connections()
+        if refresh:
+            moved = refresh_utc_minutes(now)
+            if moved:
+                self.stdout.write(f'Moved {moved} schedules to a new UTC minute')
+
+        started = time.perf_counter()
+        sent = dispatch(now, catch_up=self.catch_up, batch_size=self.batch_size)
+        if sent:
+            self.stdout.write(self.style.SUCCESS(
+                f'{now:%H:%M} UTC: dispatched {sent} quotes in {time.perf_counter() - started:.2f}s'
+            ))
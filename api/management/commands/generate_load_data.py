@@ -0,0 +1,237 @@
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Category, Reminder, Task
+from api.scheduling import (
+    reminder_occurrences,
+    reminder_title,
+    snooze_offsets,
+    snooze_title
+)
+from users.models import CompletionStats, Profile, User
+from users.timezones import zone_for_name
+
+CATEGORY_NAMES = [
+    'Work', 'Personal', 'Health', 'Finance', 'Family',
+    'Errands', 'Learning', 'Home', 'Fitness', 'Travel'
+]
+TASK_VERBS = ['Call', 'Email', 'Review', 'Buy', 'Schedule', 'Finish', 'Plan', 'Pay', 'Clean', 'Book']
+TASK_NOUNS = ['report', 'dentist', 'groceries', 'rent', 'meeting', 'slides', 'flights', 'car service', 'budget', 'gym session']
+PRIORITIES = ['low', 'medium', 'high']
+PRIORITY_WEIGHTS = [3, 5, 2]
+SNOOZE_CHOICES = [5, 10, 15, 30, 60, 120]
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic synthetic users, tasks and reminders for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of users to create')
+        parser.add_argument('--tasks-per-user', type=int, default=50, help='Number of tasks per user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed produces the same data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create statement')
+        parser.add_argument(
+            '--users-per-chunk',
+            type=int,
+            default=500,
+            help='Users generated and committed per transaction'
+        )
+        parser.add_argument('--password', default='loadtest123', help='Password set on every generated user')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.tasks_per_user = options['tasks_per_user']
+        self.seed = options['seed']
+        # Anchor every generated date on today so a seed reproduces the same schedule shape
+        self.now = timezone.now()
+        self.today = timezone.localdate()
+        # Every generated profile is on UTC, so reminders skip the per-user zone lookup
+        self.zone = zone_for_name('UTC')
+        # Hashing is deliberately slow, so every user shares one hash
+        self.password = make_password(options['password'])
+
+        total_users = options['users']
+        chunk_size = options['users_per_chunk']
+        totals = {'users': 0, 'tasks': 0, 'reminders': 0}
+        started = time.perf_counter()
+
+        for first in range(0, total_users, chunk_size):
+            count = min(chunk_size, total_users - first)
+            with transaction.atomic():
+                created = self.generate_chunk(first, count)
+            for key, value in created.items():
+                totals[key] += value
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{totals['users']}/{total_users} users, {totals['tasks']} tasks, "
+                f"{totals['reminders']} reminders ({elapsed:.1f}s)"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully generated {totals['users']} users, {totals['tasks']} tasks and "
+                f"{totals['reminders']} reminders in {time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def generate_chunk(self, first, count):
+        # bulk_create never sends post_save, so the profile, stats and
+        # reminder signals are bypassed and every row is built here instead
+        users = [
+            User(
+                uid=self.uuid(),
+                email=f'load-{self.seed}-{index}@example.com',
+                username=f'load-{self.seed}-{index}',
+                password=self.password,
+                is_active=True
+            )
+            for index in range(first, first + count)
+        ]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+
+        profiles = [
+            Profile(
+                user=user,
+                display_name=user.username,
+                timezone='UTC',
+                notification_preferences={'email': True, 'push': True, 'in_app': True}
+            )
+            for user in users
+        ]
+        Profile.objects.bulk_create(profiles, batch_size=self.batch_size)
+
+        categories = {}
+        category_rows = []
+        for user in users:
+            names = self.rng.sample(CATEGORY_NAMES, self.rng.randint(2, 5))
+            categories[user.pk] = [Category(name=name, user=user) for name in names]
+            category_rows.extend(categories[user.pk])
+        Category.objects.bulk_create(category_rows, batch_size=self.batch_size)
+        if category_rows and category_rows[0].pk is None:
+            # Backends without RETURNING support leave the ids unset
+            by_key = {
+                (c.user_id, c.name): c
+                for c in Category.objects.filter(user__in=users)
+            }
+            for user_categories in categories.values():
+                user_categories[:] = [by_key[(c.user_id, c.name)] for c in user_categories]
+
+        tasks = []
+        stats = []
+        for user, profile in zip(users, profiles):
+            completed = 0
+            for _ in range(self.tasks_per_user):
+                task = self.build_task(user, categories[user.pk])
+                completed += task.completed
+                tasks.append(task)
+            stats.append(CompletionStats(
+                profile=profile,
+                total=self.tasks_per_user,
+                completed=completed,
+                active=self.tasks_per_user - completed
+            ))
+        CompletionStats.objects.bulk_create(stats, batch_size=self.batch_size)
+
+        reminder_count = 0
+        for start in range(0, len(tasks), self.batch_size):
+            Task.objects.bulk_create(tasks[start:start + self.batch_size])
+
+        # Reminders are the bulk of the data, so only one batch is held in memory at a time
+        reminders = []
+        for task in tasks:
+            reminders.extend(self.build_reminders(task))
+            if len(reminders) >= self.batch_size:
+                Reminder.objects.bulk_create(reminders)
+                reminder_count += len(reminders)
+                reminders = []
+        if reminders:
+            Reminder.objects.bulk_create(reminders)
+            reminder_count += len(reminders)
+
+        return {'users': len(users), 'tasks': len(tasks), 'reminders': reminder_count}
+
+    def build_task(self, user, categories):
+        rng = self.rng
+        kind = rng.random()
+        daily_reminder = is_recurring = False
+        recurrence_pattern = None
+
+        # Roughly 60% one-off tasks, 20% daily reminders and 20% recurring tasks
+        if kind < 0.2:
+            daily_reminder = True
+            due_date = self.today + timedelta(days=rng.randint(0, 14))
+        elif kind < 0.4:
+            is_recurring = True
+            recurrence_pattern = rng.choices(['daily', 'weekly', 'monthly'], weights=[2, 5, 3])[0]
+            due_date = self.today + timedelta(days=rng.randint(0, 30))
+        else:
+            due_date = self.today + timedelta(days=rng.randint(-30, 60))
+
+        snooze_times = []
+        if rng.random() < 0.5:
+            snooze_times = sorted(rng.sample(SNOOZE_CHOICES, rng.randint(1, 3)))
+
+        task = Task(
+            uid=self.uuid(),
+            user=user,
+            title=f'{rng.choice(TASK_VERBS)} {rng.choice(TASK_NOUNS)}',
+            description='Generated for load testing',
+            category=rng.choice(categories) if rng.random() < 0.8 else None,
+            priority=rng.choices(PRIORITIES, weights=PRIORITY_WEIGHTS)[0],
+            is_recurring=is_recurring,
+            recurrence_pattern=recurrence_pattern,
+            daily_reminder=daily_reminder,
+            snooze_times=snooze_times,
+            completed=due_date < self.today and rng.random() < 0.7,
+            due_date=due_date,
+            # Clustered on quarter hours between 06:00 and 22:00
+            time=datetime.min.replace(hour=rng.randint(6, 21), minute=rng.choice([0, 15, 30, 45])).time()
+        )
+        # bulk_create skips Task.save(), which stamps this
+        task.completed_at = self.now if task.completed else None
+        return task
+
+    def build_reminders(self, task):
+        """
+        Materialize the reminders the post_save signal creates for a new task, in
+        the state the app leaves them in by now: elapsed main reminders are sent
+        and completed, and a completed task's reminders are completed, as
+        mark_completed does. A freshly saved task's reminders are all pending.
+        """
+        reminders = []
+        for reminder_datetime, reminder_type in reminder_occurrences(task, created=True, now=self.now, zone=self.zone):
+            elapsed = reminder_datetime <= self.now
+            reminders.append(Reminder(
+                uid=self.uuid(),
+                user_id=task.user_id,
+                task=task,
+                title=reminder_title(task, reminder_type),
+                reminder_datetime=reminder_datetime,
+                sent=elapsed,
+                is_completed=elapsed or task.completed
+            ))
+            for snooze_minutes in snooze_offsets(task):
+                snooze_datetime = reminder_datetime - timedelta(minutes=snooze_minutes)
+                if snooze_datetime > self.now:
+                    reminders.append(Reminder(
+                        uid=self.uuid(),
+                        user_id=task.user_id,
+                        task=task,
+                        title=snooze_title(task, snooze_minutes),
+                        reminder_datetime=snooze_datetime,
+                        is_completed=task.completed,
+                        is_snooze=True,
+                        snooze_minutes=snooze_minutes
+                    ))
+        return reminders
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from redis.exceptions import RedisError
+
+from api.models import SpilledEvent
+from api.stream import replay
+
+
+class Command(BaseCommand):
+    help = 'Publish events spilled while Redis was unavailable, oldest first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Events per Redis pipeline')
+
+    def handle(self, *args, **options):
+        pending = SpilledEvent.objects.count()
+        if not pending:
+            self.stdout.write('No spilled events to replay')
+            return
+
+        try:
+            replayed = replay(batch_size=options['batch_size'])
+        except RedisError as e:
+            raise CommandError(f'Redis is still unavailable: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully replayed {replayed} of {pending} spilled events'))
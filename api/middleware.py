@@ -0,0 +1,31 @@
+from . import events, jobs
+
+
+class EventMiddleware:
+    """
+    Coalesce reminder stream events per request.
+    Events committed while handling the request are merged per reminder and
+    published once when the response is ready.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with events.deferred():
+            return self.get_response(request)
+
+
+class JobMiddleware:
+    """
+    Dispatch side-effect jobs once per request.
+    Jobs committed while handling the request are merged per task and user and
+    sent to Celery when the response is ready.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with jobs.deferred():
+            return self.get_response(request)
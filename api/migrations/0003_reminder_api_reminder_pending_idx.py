@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-19 12:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_alter_task_recurrence_pattern'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_completed', False), ('sent', False)), fields=['reminder_datetime'], name='api_reminder_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-19 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_reminder_api_reminder_pending_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpilledEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream', models.CharField(max_length=100)),
+                ('fields', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
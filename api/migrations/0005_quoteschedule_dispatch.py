@@ -0,0 +1,57 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:07
+
+from datetime import timezone as dt_timezone
+from zoneinfo import ZoneInfo, available_timezones
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def utc_minute(scheduled_time, zone, now):
+    """utc_minute as of this migration: the local time shifted by the zone's current offset"""
+    offset = int(now.astimezone(zone).utcoffset().total_seconds()) // 60
+    return (scheduled_time.hour * 60 + scheduled_time.minute - offset) % (24 * 60)
+
+
+def populate_utc_minute(apps, schema_editor):
+    QuoteSchedule = apps.get_model('api', 'QuoteSchedule')
+    Profile = apps.get_model('users', 'Profile')
+    # Blank or unknown names fall back to UTC
+    valid = available_timezones()
+    zones = {
+        user_id: ZoneInfo(name) if name in valid else dt_timezone.utc
+        for user_id, name in Profile.objects.values_list('user_id', 'timezone')
+    }
+    now = timezone.now()
+    for schedule in QuoteSchedule.objects.all():
+        zone = zones.get(schedule.user_id, dt_timezone.utc)
+        schedule.utc_minute = utc_minute(schedule.scheduled_time, zone, now)
+        schedule.save(update_fields=['utc_minute'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_spilledevent'),
+        ('users', '0010_remove_profile_completion_rate_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quoteschedule',
+            name='last_sent_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='quoteschedule',
+            name='utc_minute',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='quoteschedule',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['utc_minute', 'last_sent_on'], name='api_quote_due_idx'),
+        ),
+        migrations.RunPython(populate_utc_minute, migrations.RunPython.noop),
+    ]
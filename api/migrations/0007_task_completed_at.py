@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:00
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # The last update is the best record of when existing tasks were completed
+    Task = apps.get_model('api', 'Task')
+    Task.objects.filter(completed=True).update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
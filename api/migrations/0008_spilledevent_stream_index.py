@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_task_completed_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='spilledevent',
+            index=models.Index(fields=['stream', 'id'], name='api_spill_stream_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+
+class AtomicWritesMixin:
+    """
+    Run every unsafe request in one transaction, so a view's writes and the
+    events they queue either all commit or all roll back.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            # DRF turns exceptions into error responses, which would otherwise commit
+            if getattr(response, 'exception', False):
+                transaction.set_rollback(True)
+            return response
+
+
+class SparseFieldsMixin:
+    """
+    Narrow read responses with `?fields=uid,title,...`.
+
+    Lists are served by `values_serializer_class`, which builds each row from
+    `values_list()` and selects only the columns (and joins) the requested fields
+    need. Other reads go through the regular serializer, with the fields that were
+    not asked for dropped before anything is rendered. Unknown names are a 400.
+    """
+    fields_param = 'fields'
+    values_serializer_class = None
+
+    def requested_fields(self, allowed):
+        raw = self.request.query_params.get(self.fields_param)
+        if not raw:
+            return None
+        names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ValidationError({self.fields_param: f"Unknown fields: {', '.join(unknown)}"})
+        return names
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.request.method in SAFE_METHODS:
+            target = getattr(serializer, 'child', serializer)
+            names = self.requested_fields(target.fields)
+            if names is not None:
+                for name in set(target.fields) - set(names):
+                    target.fields.pop(name)
+        return serializer
+
+    def values_response(self, queryset):
+        """Serialize a read-only list from values() rows"""
+        names = self.requested_fields(self.values_serializer_class.fields)
+        return Response(self.values_serializer_class(queryset, names).data)
+
+    def list(self, request, *args, **kwargs):
+        # Paginated lists keep the regular path, the fast path has no page handling
+        if self.values_serializer_class is None or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        return self.values_response(self.filter_queryset(self.get_queryset()))
@@ -5,6 +5,8 @@ from users.models import User
 from django.db import models
 import uuid
 from django.db.models import Q
+from users.timezones import user_zone
+from .scheduling import utc_minute_of_day
 
 class Category(models.Model):
     name = models.CharField(
@@ -25,6 +27,10 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
         ordering = ['name']
         unique_together = ['name', 'user']  # Prevent duplicate category names per user
+        indexes = [
+            # Delta sync reads a user's changes in updated_at order
+            models.Index(fields=['user', 'updated_at'], name='api_category_sync_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} (Created by: {self.user.username})"
@@ -59,11 +65,29 @@ class Task(models.Model):
     due_date = models.DateField()
     time = models.TimeField()
     daily_reminder = models.BooleanField(default=False)
+    # When the task was last marked completed; reopening clears it. Later edits
+    # move updated_at but not this, so rollups can undo a completion on its own day.
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='api_task_sync_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        if self.completed and self.completed_at is None:
+            self.completed_at = timezone.now()
+        elif not self.completed:
+            self.completed_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'completed' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        super().save(*args, **kwargs)
     
     def clean(self):
         # Validate due_date is not in the past
@@ -82,6 +106,15 @@ class Task(models.Model):
                 if not isinstance(time, int) or time <= 0:
                     raise ValidationError('Snooze times must be positive integers.')
 
+# Reminders that have not fired yet; also the condition of the partial index below
+PENDING_REMINDER = Q(sent=False, is_completed=False, is_active=True)
+
+
+class ReminderQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(PENDING_REMINDER)
+
+
 class Reminder(models.Model):
     
     uid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -96,6 +129,8 @@ class Reminder(models.Model):
     is_completed = models.BooleanField(default=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ReminderQuerySet.as_manager()
+
     def __str__(self):
         return self.title
     
@@ -108,7 +143,7 @@ class Reminder(models.Model):
 
         # Ensure the datetime is timezone-aware
         if timezone.is_naive(self.reminder_datetime):
-            self.reminder_datetime = timezone.make_aware(self.reminder_datetime)
+            self.reminder_datetime = timezone.make_aware(self.reminder_datetime, user_zone(self.user_id))
         
         # Get current time (timezone-aware)
         now = timezone.now()
@@ -150,13 +185,21 @@ class Reminder(models.Model):
             # Using Q objects with OR operator (|) to combine conditions
             (Q(reminder_datetime__lte=current_time) | Q(sent=True)) & 
             Q(is_completed=False)
-        ).update(is_completed=True)
+        ).update(is_completed=True, updated_at=current_time)
         return updated_count
 
     class Meta:
         indexes = [
             models.Index(fields=['reminder_datetime', 'is_completed']),
             models.Index(fields=['sent', 'is_completed']),  # Added new index for sent field
+            # Only pending reminders are ever scanned by time, and they are a small
+            # fraction of the table. Partial indexes work on Postgres and SQLite.
+            models.Index(
+                fields=['reminder_datetime'],
+                condition=PENDING_REMINDER,
+                name='api_reminder_pending_idx'
+            ),
+            models.Index(fields=['user', 'updated_at'], name='api_reminder_sync_idx'),
         ]
         ordering = ['reminder_datetime']
 
@@ -167,7 +210,73 @@ class QuoteSchedule(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     scheduled_time = models.TimeField()  # Daily time to send quotes
     is_active = models.BooleanField(default=True)
-    
+    # scheduled_time in the user's timezone as a minute of the UTC day, so the
+    # dispatcher can select everyone due in a minute with one index range scan.
+    # Kept current on save and by api.quotes.refresh_utc_minutes.
+    utc_minute = models.PositiveSmallIntegerField(default=0, editable=False)
+    last_sent_on = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['utc_minute', 'last_sent_on'],
+                condition=Q(is_active=True),
+                name='api_quote_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Quotes for {self.user} at {self.scheduled_time}"
+
+    def save(self, *args, **kwargs):
+        self.utc_minute = utc_minute_of_day(self.scheduled_time, user_zone(self.user_id))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'utc_minute'}
+        super().save(*args, **kwargs)
+
+
+class SpilledEvent(models.Model):
+    """Stream event held locally while Redis is unreachable, replayed in id order once it recovers"""
+    stream = models.CharField(max_length=100)
+    fields = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Per-stream spill caps count back from the newest event of each stream
+            models.Index(fields=['stream', 'id'], name='api_spill_stream_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.stream} event {self.fields.get('action', '')} ({self.created_at})"
+
+
+class Tombstone(models.Model):
+    """
+    A deleted Task, Reminder or Category, so delta sync can tell offline clients
+    about it. Kept for SYNC_TOMBSTONE_RETENTION_DAYS. user_id is not a foreign key:
+    nothing is recorded when the user themselves is deleted, and the rows left
+    behind age out with the rest.
+    """
+    TASK, REMINDER, CATEGORY = 1, 2, 3
+    KIND_CHOICES = [(TASK, 'Task'), (REMINDER, 'Reminder'), (CATEGORY, 'Category')]
+
+    user_id = models.UUIDField()
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=36)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at', 'id'], name='api_tombstone_sync_idx'),
+            models.Index(fields=['deleted_at'], name='api_tombstone_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id} deleted at {self.deleted_at}"
+
 
 # class TaskTemplate(models.Model):
 #     name = models.CharField(max_length=200)
@@ -0,0 +1,27 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser decoding with orjson when available, the stdlib otherwise"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        try:
+            if codecs.lookup(encoding).name != 'utf-8':
+                # orjson only reads UTF-8
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        # LookupError is an unknown charset; UnicodeDecodeError is a ValueError
+        except (LookupError, ValueError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,136 @@
+"""
+Daily quote dispatch for QuoteSchedule.
+
+Schedules are bucketed by QuoteSchedule.utc_minute, the user's local
+scheduled_time expressed as a minute of the UTC day. Each tick selects every
+active schedule due in the current minute (plus a short catch-up window for
+missed ticks) that has not been sent today, using the partial
+api_quote_due_idx index, and publishes one event per user to the quotes
+stream. Events go out in pipelined batches of QUOTE_DISPATCH_BATCH_SIZE, so
+a bucket where 100k users picked 08:00 costs a few round trips rather than
+100k. Quotes come from a JSON corpus read once per process.
+
+Run one dispatcher per deployment: rows are marked sent after their batch is
+published, so concurrent dispatchers could both send the same bucket.
+"""
+import json
+import logging
+import zlib
+from datetime import timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Q, Value
+from django.db.models.functions import ExtractHour, ExtractMinute, Mod
+from django.utils import timezone
+
+from users.timezones import zone_for_name
+
+from .models import QuoteSchedule
+from .scheduling import MINUTES_PER_DAY, utc_offset_minutes
+from .stream import publish_many
+
+logger = logging.getLogger(__name__)
+
+QUOTE_STREAM = 'quotes'
+
+
+@lru_cache(maxsize=1)
+def corpus():
+    """All quotes as (text, author) pairs, loaded from QUOTE_CORPUS_PATH on first use"""
+    with open(settings.QUOTE_CORPUS_PATH, encoding='utf-8') as f:
+        quotes = tuple((quote['text'], quote.get('author', '')) for quote in json.load(f))
+    if not quotes:
+        raise ValueError(f'No quotes found in {settings.QUOTE_CORPUS_PATH}')
+    return quotes
+
+
+def pick_quote(user_id, day):
+    """
+    Quote for a user on a given day.
+    Stable for the same user and day, so a retried dispatch resends the same quote.
+    """
+    quotes = corpus()
+    return quotes[zlib.crc32(f'{user_id}:{day.isoformat()}'.encode()) % len(quotes)]
+
+
+def build_quote_message(user_id, email, scheduled_time, day):
+    text, author = pick_quote(user_id, day)
+    return {
+        'user_id': str(user_id),
+        'email': email,
+        'action': 'quote',
+        'quote': text,
+        'author': author,
+        'scheduled_time': scheduled_time.isoformat(),
+        'date': day.isoformat(),
+    }
+
+
+def refresh_utc_minutes(now=None):
+    """
+    Recompute utc_minute for every active schedule from its user's current timezone offset.
+    Issues one UPDATE per distinct timezone, which picks up DST changes and timezone
+    edits. Returns the number of schedules whose bucket moved.
+    """
+    now = now or timezone.now()
+    active = QuoteSchedule.objects.filter(is_active=True)
+    timezone_names = active.values_list('user__profile__timezone', flat=True).distinct()
+
+    moved = 0
+    for timezone_name in list(timezone_names):
+        offset = utc_offset_minutes(zone_for_name(timezone_name), now)
+        local_minute = ExtractHour('scheduled_time') * 60 + ExtractMinute('scheduled_time')
+        minute = Mod(local_minute + Value(MINUTES_PER_DAY - offset), Value(MINUTES_PER_DAY))
+        moved += (
+            active.filter(user__profile__timezone=timezone_name)
+            .exclude(utc_minute=minute)
+            .update(utc_minute=minute)
+        )
+    return moved
+
+
+def due_schedules(day, first_minute, last_minute):
+    """(user_id, email, scheduled_time) for active schedules in the minute range not yet sent on `day`"""
+    return (
+        QuoteSchedule.objects
+        .filter(is_active=True, utc_minute__range=(first_minute, last_minute))
+        .filter(Q(last_sent_on__isnull=True) | Q(last_sent_on__lt=day))
+        .order_by()
+        .values_list('user_id', 'user__email', 'scheduled_time')
+    )
+
+
+def dispatch(now=None, catch_up=None, batch_size=None):
+    """
+    Publish quotes for every schedule due at `now`, and for the `catch_up` minutes
+    before it that a stalled dispatcher may have missed. Returns the number of
+    quotes published or spilled for replay.
+    """
+    now = (now or timezone.now()).astimezone(dt_timezone.utc)
+    catch_up = settings.QUOTE_DISPATCH_CATCH_UP_MINUTES if catch_up is None else catch_up
+    batch_size = batch_size or settings.QUOTE_DISPATCH_BATCH_SIZE
+    day = now.date()
+    minute = now.hour * 60 + now.minute
+
+    # A catch-up window reaching back past midnight also covers the previous UTC
+    # day's last buckets, which are sent as that day's quotes
+    windows = [(day, max(0, minute - catch_up), minute)]
+    if minute < catch_up:
+        windows.append((day - timedelta(days=1), MINUTES_PER_DAY + minute - catch_up, MINUTES_PER_DAY - 1))
+
+    sent = 0
+    for window_day, first_minute, last_minute in windows:
+        rows = list(due_schedules(window_day, first_minute, last_minute))
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            publish_many(QUOTE_STREAM, [
+                build_quote_message(user_id, email, scheduled_time, window_day)
+                for user_id, email, scheduled_time in batch
+            ])
+            QuoteSchedule.objects.filter(user_id__in=[row[0] for row in batch]).update(last_sent_on=window_day)
+        sent += len(rows)
+
+    if sent:
+        logger.info(f"Dispatched {sent} quotes for {now:%H:%M} UTC")
+    return sent
@@ -0,0 +1,41 @@
+"""
+Process-wide Redis client.
+
+Every module publishing to Redis goes through get_redis(), so a process holds
+one connection pool, sized by REDIS_MAX_CONNECTIONS, and nothing connects at
+import time. redis-py pools check the pid on every checkout and drop inherited
+connections after a fork, so a client created in the gunicorn master is still
+safe to use in the workers.
+"""
+import threading
+
+import redis
+from django.conf import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.Redis(connection_pool=_build_pool())
+    return _client
+
+
+def _build_pool():
+    # Blocking so a burst of threads waits for a free connection instead of failing
+    return redis.BlockingConnectionPool(
+        host=settings.REDIS_URL,
+        port=settings.REDIS_PORT,
+        db=0,
+        password=settings.REDIS_PASSWORD,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=5,
+        socket_connect_timeout=5,
+        # Idle connections are pinged before reuse, so one dropped by a proxy is replaced rather than erroring
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
+    )
@@ -0,0 +1,62 @@
+"""
+JSON rendering for the REST API backed by orjson when it is installed.
+
+orjson writes UUID, datetime, date and time values itself, in C, so serializers
+can hand them over as they come from the database instead of converting each
+row in Python. Without orjson the stdlib encoder produces the same output:
+UUIDs as strings and temporal values as isoformat(). DRF's stock JSONRenderer
+differs there. It writes 'Z' for UTC and cuts microseconds to milliseconds.
+Everything else the stdlib cannot encode natively (Decimal, lazy translations,
+querysets, ...) goes through DRF's encoder, as before.
+"""
+import datetime
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class StdlibEncoder(JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+_fallback = StdlibEncoder()
+
+
+def stdlib_dumps(data, indent=None):
+    separators = (',', ':') if indent is None else (',', ': ')
+    return json.dumps(data, cls=StdlibEncoder, indent=indent, ensure_ascii=False, separators=separators).encode()
+
+
+if orjson is not None:
+    # Non-string keys (ints, UUIDs, dates) are written as strings, like the stdlib does for ints
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def orjson_dumps(data, indent=None):
+        option = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+        return orjson.dumps(data, default=_fallback.default, option=option)
+
+    dumps = orjson_dumps
+else:
+    dumps = stdlib_dumps
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using orjson when available; serializers may return native UUID and datetime values"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        ret = dumps(data, indent=self.get_indent(accepted_media_type, renderer_context or {}))
+        # Escaped like JSONRenderer does, so the output stays a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
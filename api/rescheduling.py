@@ -0,0 +1,127 @@
+"""
+Diff-based rescheduling of a task's reminders.
+
+When a task's schedule changes, its pending reminders are moved rather than
+recreated. Every future pending row, snooze rows included, is shifted by the
+change in the task's base datetime with one UPDATE, so reminder uids stay stable
+and consumers see 'rescheduled'. The shifted rows are then compared with the
+occurrences the new schedule calls for. Only rows that no longer match are
+deleted ('cancelled'), and only missing occurrences are created ('created').
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from users.timezones import user_zone
+
+from . import events
+from .models import Reminder
+from .scheduling import (
+    base_reminder_datetime,
+    reminder_occurrences,
+    reminder_title,
+    snooze_offsets,
+    snooze_title
+)
+
+logger = logging.getLogger(__name__)
+
+# Task fields that decide which reminders a task has
+SCHEDULE_FIELDS = ('due_date', 'time', 'daily_reminder', 'is_recurring', 'recurrence_pattern', 'snooze_times')
+
+
+def schedule_snapshot(task):
+    return {field: getattr(task, field) for field in SCHEDULE_FIELDS}
+
+
+def schedule_changed(snapshot, validated_data):
+    return any(
+        field in validated_data and validated_data[field] != snapshot[field]
+        for field in SCHEDULE_FIELDS
+    )
+
+
+def desired_reminders(task, now, zone):
+    """
+    Map of reminder key -> (reminder_datetime, reminder_type, snooze_minutes) for the
+    future reminders the task's current schedule calls for. Keys are
+    (reminder_datetime, snooze_minutes), with snooze_minutes None for main reminders.
+    """
+    occurrences = [(base_reminder_datetime(task, zone), 'initial')]
+    occurrences += reminder_occurrences(task, created=False, now=now, zone=zone)
+    offsets = snooze_offsets(task)
+
+    desired = {}
+    for reminder_datetime, reminder_type in occurrences:
+        if reminder_datetime > now:
+            desired.setdefault((reminder_datetime, None), (reminder_datetime, reminder_type, None))
+        for snooze_minutes in offsets:
+            snooze_datetime = reminder_datetime - timedelta(minutes=snooze_minutes)
+            if snooze_datetime > now:
+                desired.setdefault(
+                    (snooze_datetime, snooze_minutes),
+                    (snooze_datetime, reminder_type, snooze_minutes)
+                )
+    return desired
+
+
+def reschedule_reminders(task, previous):
+    """
+    Bring the task's future pending reminders in line with its schedule after an
+    update. `previous` is the schedule_snapshot taken before the update.
+    Returns (rescheduled, created, cancelled) counts.
+    """
+    now = timezone.now()
+    zone = user_zone(task.user_id)
+    previous_base = timezone.make_aware(datetime.combine(previous['due_date'], previous['time']), zone)
+    delta = base_reminder_datetime(task, zone) - previous_base
+
+    rows = list(task.reminders.pending().filter(reminder_datetime__gt=now))
+    desired = desired_reminders(task, now, zone)
+
+    kept, doomed = [], []
+    for reminder in rows:
+        key = (reminder.reminder_datetime + delta, reminder.snooze_minutes if reminder.is_snooze else None)
+        # A key already claimed by another row is a duplicate
+        if key in desired:
+            del desired[key]
+            kept.append(reminder)
+        else:
+            doomed.append(reminder)
+
+    if delta and kept:
+        Reminder.objects.filter(uid__in=[reminder.uid for reminder in kept]).update(
+            reminder_datetime=F('reminder_datetime') + delta,
+            updated_at=now
+        )
+        for reminder in kept:
+            reminder.reminder_datetime += delta
+            events.queue(reminder, 'rescheduled')
+
+    if doomed:
+        Reminder.objects.filter(uid__in=[reminder.uid for reminder in doomed]).delete()
+        for reminder in doomed:
+            events.queue(reminder, 'cancelled')
+
+    # bulk_create sends no post_save, so the events are queued here
+    created = Reminder.objects.bulk_create([
+        Reminder(
+            user_id=task.user_id,
+            task=task,
+            title=snooze_title(task, snooze_minutes) if snooze_minutes else reminder_title(task, reminder_type),
+            reminder_datetime=reminder_datetime,
+            is_snooze=snooze_minutes is not None,
+            snooze_minutes=snooze_minutes
+        )
+        for reminder_datetime, reminder_type, snooze_minutes in desired.values()
+    ])
+    for reminder in created:
+        events.queue(reminder, 'created')
+
+    rescheduled = len(kept) if delta else 0
+    logger.info(
+        f"Rescheduled task {task.uid}: {rescheduled} moved, {len(created)} created, {len(doomed)} cancelled"
+    )
+    return rescheduled, len(created), len(doomed)
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from users.timezones import user_zone
+
+RECURRENCE_STEPS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'monthly': timedelta(days=30)
+}
+
+# Number of upcoming occurrences materialized for recurring tasks
+RECURRING_OCCURRENCES = 5
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def format_snooze_display(snooze_minutes):
+    """Format snooze minutes for display, e.g. 90 -> '1h 30m'"""
+    if snooze_minutes >= 60:
+        hours = snooze_minutes // 60
+        mins = snooze_minutes % 60
+        return f"{hours}h{f' {mins}m' if mins else ''}"
+    return f"{snooze_minutes}m"
+
+
+def base_reminder_datetime(task, zone=None):
+    """The task's due date and time in the user's timezone"""
+    zone = zone or user_zone(task.user_id)
+    return timezone.make_aware(datetime.combine(task.due_date, task.time), zone)
+
+
+def reminder_occurrences(task, created, now=None, zone=None):
+    """
+    Return (reminder_datetime, reminder_type) pairs for the main reminders a task should have.
+    reminder_type is one of 'initial', 'daily' or 'recurring'. Times are local to `zone`,
+    the task owner's timezone unless given.
+    """
+    now = now or timezone.now()
+    zone = zone or user_zone(task.user_id)
+    base_datetime = base_reminder_datetime(task, zone)
+    occurrences = []
+
+    # The initial reminder is only created together with the task
+    if created:
+        occurrences.append((base_datetime, 'initial'))
+
+    if task.daily_reminder:
+        current_date = timezone.localdate(now, zone)
+        while current_date <= task.due_date:
+            reminder_datetime = timezone.make_aware(datetime.combine(current_date, task.time), zone)
+            # Skip the initial reminder and anything already in the past
+            if reminder_datetime != base_datetime and reminder_datetime > now:
+                occurrences.append((reminder_datetime, 'daily'))
+            current_date += timedelta(days=1)
+
+    elif task.is_recurring and task.recurrence_pattern:
+        step = RECURRENCE_STEPS.get(task.recurrence_pattern)
+        if step:
+            next_date = task.due_date
+            for _ in range(RECURRING_OCCURRENCES):
+                next_date += step
+                reminder_datetime = timezone.make_aware(datetime.combine(next_date, task.time), zone)
+                if reminder_datetime > now:
+                    occurrences.append((reminder_datetime, 'recurring'))
+
+    return occurrences
+
+
+def snooze_offsets(task):
+    """Snooze minutes configured on the task, furthest notification first"""
+    if not task.snooze_times or not isinstance(task.snooze_times, list):
+        return []
+    return sorted([int(t) for t in task.snooze_times], reverse=True)
+
+
+def reminder_title(task, reminder_type):
+    if reminder_type == 'recurring':
+        return f"Recurring Reminder: {task.title}"
+    if reminder_type == 'daily':
+        return f"Daily Reminder: {task.title}"
+    return f"Reminder: {task.title}"
+
+
+def snooze_title(task, snooze_minutes):
+    return f"Early Reminder: {task.title} (in {format_snooze_display(snooze_minutes)})"
+
+
+def utc_offset_minutes(zone, now=None):
+    """Current offset of `zone` from UTC in minutes"""
+    now = now or timezone.now()
+    return int(now.astimezone(zone).utcoffset().total_seconds()) // 60
+
+
+def utc_minute_of_day(scheduled_time, zone, now=None):
+    """
+    Minute of the UTC day (0-1439) at which a daily local `scheduled_time` falls.
+    Uses the zone's current offset, so it shifts by an hour across DST changes.
+    """
+    local_minute = scheduled_time.hour * 60 + scheduled_time.minute
+    return (local_minute - utc_offset_minutes(zone, now)) % MINUTES_PER_DAY
+
+
+def local_day_range(day, zone):
+    """[start, end) datetimes of a calendar day in `zone`, for index-friendly range filters"""
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()), zone)
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()), zone)
+    return start, end
@@ -0,0 +1,140 @@
+import graphene
+from django.conf import settings
+from django.utils import timezone
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from users.timezones import user_zone
+from .models import Category, Reminder, Task
+from .scheduling import local_day_range
+
+
+def current_user(info):
+    user = info.context.user
+    if not user.is_authenticated:
+        raise GraphQLError('Authentication credentials were not provided.')
+    return user
+
+
+def bounded(limit):
+    """Clamp a list argument to GRAPHQL_MAX_LIST_SIZE; the cost rule assumes the same bound"""
+    return max(0, min(limit, settings.GRAPHQL_MAX_LIST_SIZE))
+
+
+class CategoryStatsType(graphene.ObjectType):
+    total_tasks = graphene.Int(required=True)
+    active_tasks = graphene.Int(required=True)
+    completed_tasks = graphene.Int(required=True)
+
+
+class CategoryType(DjangoObjectType):
+    stats = graphene.Field(CategoryStatsType, required=True)
+
+    class Meta:
+        model = Category
+        fields = ('id', 'name', 'created_at')
+
+    def resolve_stats(self, info):
+        return CategoryStatsType(**info.context.loaders.category_stats.load(self.pk))
+
+
+class TaskType(DjangoObjectType):
+    category = graphene.Field(CategoryType)
+    # Defaults to the size the cost rule assumes for relation lists without a limit
+    reminders = graphene.List(
+        graphene.NonNull(lambda: ReminderType),
+        required=True,
+        limit=graphene.Int(default_value=settings.GRAPHQL_DEFAULT_LIST_COST)
+    )
+    snooze_times = graphene.List(graphene.NonNull(graphene.Int), required=True)
+
+    class Meta:
+        model = Task
+        fields = (
+            'uid', 'title', 'description', 'priority', 'due_date', 'time',
+            'completed', 'daily_reminder', 'is_recurring', 'recurrence_pattern',
+            'created_at', 'updated_at'
+        )
+        # Plain strings, the same values the REST API returns
+        convert_choices_to_enum = False
+
+    def resolve_category(self, info):
+        return info.context.loaders.categories.load(self.category_id)
+
+    def resolve_reminders(self, info, limit):
+        return info.context.loaders.reminders_by_task.load(self.pk)[:bounded(limit)]
+
+    def resolve_snooze_times(self, info):
+        return self.snooze_times or []
+
+
+class ReminderType(DjangoObjectType):
+    task = graphene.Field(TaskType, required=True)
+
+    class Meta:
+        model = Reminder
+        fields = (
+            'uid', 'title', 'reminder_datetime', 'sent', 'is_active',
+            'is_snooze', 'snooze_minutes', 'is_completed', 'updated_at'
+        )
+
+    def resolve_task(self, info):
+        return info.context.loaders.tasks.load(self.task_id)
+
+
+class Query(graphene.ObjectType):
+    tasks = graphene.List(
+        graphene.NonNull(TaskType),
+        required=True,
+        limit=graphene.Int(default_value=50),
+        completed=graphene.Boolean(),
+    )
+    upcoming_tasks = graphene.List(
+        graphene.NonNull(TaskType),
+        required=True,
+        days=graphene.Int(default_value=7),
+        limit=graphene.Int(default_value=50),
+    )
+    today_reminders = graphene.List(graphene.NonNull(ReminderType), required=True, limit=graphene.Int(default_value=50))
+    overdue_reminders = graphene.List(graphene.NonNull(ReminderType), required=True, limit=graphene.Int(default_value=50))
+    categories = graphene.List(graphene.NonNull(CategoryType), required=True, limit=graphene.Int(default_value=50))
+
+    def resolve_tasks(self, info, limit, completed=None):
+        tasks = Task.objects.filter(user=current_user(info)).order_by('-created_at')
+        if completed is not None:
+            tasks = tasks.filter(completed=completed)
+        return info.context.loaders.saw_tasks(list(tasks[:bounded(limit)]))
+
+    def resolve_upcoming_tasks(self, info, days, limit):
+        user = current_user(info)
+        today = timezone.localdate(timezone=user_zone(user.pk))
+        tasks = Task.objects.filter(
+            user=user,
+            completed=False,
+            due_date__gte=today,
+            due_date__lte=today + timezone.timedelta(days=days)
+        ).order_by('due_date', 'time')
+        return info.context.loaders.saw_tasks(list(tasks[:bounded(limit)]))
+
+    def resolve_today_reminders(self, info, limit):
+        user = current_user(info)
+        zone = user_zone(user.pk)
+        start, end = local_day_range(timezone.localdate(timezone=zone), zone)
+        reminders = Reminder.objects.filter(
+            user=user,
+            reminder_datetime__gte=start,
+            reminder_datetime__lt=end,
+            is_completed=False,
+            is_active=True
+        ).order_by('reminder_datetime')
+        return info.context.loaders.saw_reminders(list(reminders[:bounded(limit)]))
+
+    def resolve_overdue_reminders(self, info, limit):
+        reminders = Reminder.objects.filter(user=current_user(info)).pending().filter(
+            reminder_datetime__lt=timezone.now()
+        ).order_by('reminder_datetime')
+        return info.context.loaders.saw_reminders(list(reminders[:bounded(limit)]))
+
+    def resolve_categories(self, info, limit):
+        categories = Category.objects.filter(user=current_user(info)).order_by('name')
+        return info.context.loaders.saw_categories(list(categories[:bounded(limit)]))
@@ -2,6 +2,30 @@ from rest_framework import serializers
 from .models import Task, Reminder, Category, QuoteSchedule
 
 
+class ValuesSerializer:
+    """
+    Read-only list serializer that builds dicts straight from `values_list()` rows,
+    skipping per-row field objects and model instances. `fields` maps each output
+    name to its lookup. Only the columns behind `field_names` are selected, with
+    the joins their lookups need. Values are returned as the database adapter
+    produced them (UUID, date, datetime, ...) for api.renderers to encode.
+    """
+    fields = {}
+
+    def __init__(self, queryset, field_names=None):
+        self.queryset = queryset
+        self.field_names = list(field_names or self.fields)
+
+    @property
+    def data(self):
+        lookups = {}
+        columns = [(name, lookups.setdefault(self.fields[name], len(lookups))) for name in self.field_names]
+        return [
+            {name: row[index] for name, index in columns}
+            for row in self.queryset.values_list(*lookups)
+        ]
+
+
 class CategorySerializer(serializers.ModelSerializer):
     task_count = serializers.IntegerField(read_only=True, default=0)
     active_tasks = serializers.IntegerField(read_only=True, default=0)
@@ -65,16 +89,54 @@ class ReminderSerializer(serializers.ModelSerializer):
         read_only_fields = ['uid', 'sent', 'is_completed']
     
     def to_representation(self, instance):
-        """Ensure datetime is in the correct format for Redis"""
+        """Keep the reminder's own datetime, rendered as isoformat by api.renderers"""
         data = super().to_representation(instance)
-        # Format datetime in ISO format for Redis
-        data['reminder_datetime'] = instance.reminder_datetime.isoformat()
-        # Add additional fields needed by Go service
-        data['user_id'] = str(instance.user.uid)
-        data['task_id'] = str(instance.task.uid)
+        data['reminder_datetime'] = instance.reminder_datetime
+        # Add additional fields needed by Go service; the ids need no query
+        data['user_id'] = instance.user_id
+        data['task_id'] = instance.task_id
         return data
 
 
+class TaskValuesSerializer(ValuesSerializer):
+    """TaskSerializer's output for lists; category_name is null rather than absent without a category"""
+    fields = {
+        'uid': 'uid',
+        'title': 'title',
+        'description': 'description',
+        'category': 'category_id',
+        'category_name': 'category__name',
+        'priority': 'priority',
+        'due_date': 'due_date',
+        'time': 'time',
+        'is_recurring': 'is_recurring',
+        'recurrence_pattern': 'recurrence_pattern',
+        'completed': 'completed',
+        'daily_reminder': 'daily_reminder',
+        'snooze_times': 'snooze_times',
+    }
+
+
+class ReminderValuesSerializer(ValuesSerializer):
+    """ReminderSerializer's output for lists"""
+    fields = {
+        'uid': 'uid',
+        'title': 'title',
+        'task': 'task_id',
+        'task_title': 'task__title',
+        'task_priority': 'task__priority',
+        'category_name': 'task__category__name',
+        'reminder_datetime': 'reminder_datetime',
+        'sent': 'sent',
+        'is_active': 'is_active',
+        'is_snooze': 'is_snooze',
+        'snooze_minutes': 'snooze_minutes',
+        'is_completed': 'is_completed',
+        'user_id': 'user_id',
+        'task_id': 'task_id',
+    }
+
+
 class ReminderDetailSerializer(serializers.ModelSerializer):
     task = TaskSerializer(read_only=True)
     
@@ -0,0 +1,194 @@
+"""
+Publishing to Redis streams behind a circuit breaker.
+
+While Redis is failing, events are not attempted at all. They go straight to
+the SpilledEvent table, which holds at most REDIS_SPILL_MAX_EVENTS rows per
+stream with the oldest dropped first. After the reset timeout, the next publish probes
+Redis by replaying the spilled backlog in its original order and then sending
+its own event. A successful probe closes the breaker. While one thread is
+replaying, other publishes spill behind the backlog instead of overtaking it.
+
+Every XADD trims the stream approximately, either to REDIS_STREAM_MAXLEN
+entries or, when REDIS_STREAM_RETENTION_SECONDS is set, to entries newer than
+the retention window. Streams listed in REDIS_STREAM_CAPS have their own MAXLEN
+and spill cap. `manage.py compact_reminder_stream` removes superseded
+events that trimming alone would keep.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from redis.exceptions import RedisError
+
+from monitoring.metrics import (
+    REDIS_REPLAYED_EVENTS,
+    REDIS_SPILL_DROPPED,
+    REDIS_SPILLED_EVENTS,
+    track_redis_publish
+)
+from .circuit_breaker import HALF_OPEN, CircuitBreaker
+from .models import SpilledEvent
+from .redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+REMINDER_STREAM = 'reminders'
+
+breaker = CircuitBreaker(
+    'redis',
+    failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.REDIS_BREAKER_RESET_TIMEOUT
+)
+
+# Set while spilled events may be waiting. It starts set so each process checks once for
+# events left behind by processes that exited before Redis came back.
+_backlog = threading.Event()
+_backlog.set()
+_replay_lock = threading.Lock()
+
+
+def stream_caps(stream):
+    """(MAXLEN, spill cap) for `stream`, the REDIS_ defaults unless it has its own"""
+    return settings.REDIS_STREAM_CAPS.get(stream, (settings.REDIS_STREAM_MAXLEN, settings.REDIS_SPILL_MAX_EVENTS))
+
+
+def trim_options(stream):
+    """
+    XADD arguments that keep the stream bounded.
+    Approximate trimming ('~') lets Redis drop whole radix tree nodes, so it
+    costs next to nothing per XADD; Redis accepts MAXLEN or MINID, not both.
+    """
+    retention = settings.REDIS_STREAM_RETENTION_SECONDS
+    if retention:
+        # Stream ids start with their millisecond timestamp
+        return {'minid': int((time.time() - retention) * 1000), 'approximate': True}
+    return {'maxlen': stream_caps(stream)[0], 'approximate': True}
+
+
+def publish(stream, fields):
+    """
+    Add `fields` to `stream` and return the stream id.
+    Returns None when the event was spilled for replay instead; raises only if it
+    could not be spilled either.
+    """
+    return publish_many(stream, [fields])[0]
+
+
+def publish_many(stream, messages):
+    """Add several messages to `stream` in one pipelined round trip; see publish()"""
+    if not messages:
+        return []
+    if not breaker.allow():
+        spill(stream, messages)
+        return [None] * len(messages)
+
+    probing = breaker.state == HALF_OPEN
+    try:
+        # Older spilled events go first, so consumers see events in order
+        if (probing or _backlog.is_set()) and replay() is None:
+            # Another thread is still replaying; queue behind its backlog rather than jump it
+            spill(stream, messages)
+            return [None] * len(messages)
+        with track_redis_publish(stream):
+            if len(messages) == 1:
+                stream_ids = [get_redis().xadd(stream, messages[0], **trim_options(stream))]
+            else:
+                trim = trim_options(stream)
+                pipeline = get_redis().pipeline(transaction=False)
+                for fields in messages:
+                    pipeline.xadd(stream, fields, **trim)
+                stream_ids = pipeline.execute()
+    except RedisError as e:
+        breaker.record_failure()
+        logger.error(f"Publishing to Redis stream '{stream}' failed, spilling {len(messages)} events: {e}")
+        spill(stream, messages)
+        return [None] * len(messages)
+    except Exception:
+        # Not a Redis failure, but a probe must still settle the breaker or it stays half-open
+        if probing:
+            breaker.record_failure()
+        raise
+
+    breaker.record_success()
+    return stream_ids
+
+
+def spill(stream, messages):
+    SpilledEvent.objects.bulk_create([SpilledEvent(stream=stream, fields=fields) for fields in messages])
+    REDIS_SPILLED_EVENTS.labels(stream=stream).inc(len(messages))
+    _backlog.set()
+
+    spilled, cap = SpilledEvent.objects.filter(stream=stream), stream_caps(stream)[1]
+    # The newest event past the cap, found through api_spill_stream_idx
+    cutoff = list(spilled.order_by('-id').values_list('id', flat=True)[cap:cap + 1])
+    dropped = spilled.filter(id__lte=cutoff[0]).delete()[0] if cutoff else 0
+    if dropped:
+        REDIS_SPILL_DROPPED.inc(dropped)
+        logger.error(f"Spill buffer for '{stream}' full, dropped {dropped} oldest events")
+
+
+def claim(batch_size):
+    """
+    Remove and return the oldest `batch_size` spilled events.
+    The short transaction only covers the database; callers publish afterwards and
+    hand the events back to restore() if that fails.
+    """
+    with transaction.atomic():
+        events = SpilledEvent.objects.order_by('id')
+        if connections[events.db].features.has_select_for_update_skip_locked:
+            events = events.select_for_update(skip_locked=True)
+        events = list(events[:batch_size])
+        SpilledEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    return events
+
+
+def restore(events):
+    """Put claimed events back under their original ids, so they keep their place in the order"""
+    SpilledEvent.objects.bulk_create(events)
+    _backlog.set()
+
+
+def replay(batch_size=None):
+    """
+    Publish spilled events oldest first, one pipeline per batch.
+    Each batch is claimed in its own short transaction and published after it
+    commits, so no database lock is held across the Redis round trip. Raises
+    RedisError if Redis fails part way; the unsent batch is restored. Returns the
+    number of events replayed, or None when another thread is already replaying.
+    """
+    batch_size = batch_size or settings.REDIS_REPLAY_BATCH_SIZE
+    if not _replay_lock.acquire(blocking=False):
+        return None
+
+    replayed = 0
+    try:
+        while True:
+            # Cleared before looking, so an event spilled after the check sets it again
+            _backlog.clear()
+            events = claim(batch_size)
+            if not events:
+                break
+
+            try:
+                pipeline = get_redis().pipeline(transaction=False)
+                for event in events:
+                    pipeline.xadd(event.stream, event.fields, **trim_options(event.stream))
+                pipeline.execute()
+            except Exception:
+                restore(events)
+                raise
+
+            for event in events:
+                REDIS_REPLAYED_EVENTS.labels(stream=event.stream).inc()
+            replayed += len(events)
+    except Exception:
+        _backlog.set()
+        raise
+    finally:
+        _replay_lock.release()
+
+    if replayed:
+        logger.info(f"Replayed {replayed} spilled events to Redis")
+    return replayed
@@ -0,0 +1,142 @@
+"""
+Delta sync for offline clients (GET /api/sync/?since=<cursor>).
+
+Every change is one entry in a single stream, ordered by
+(timestamp, kind, primary key). The timestamp is updated_at for saved tasks,
+reminders and categories, and deleted_at for tombstones. The cursor is the
+position of the last entry a response returned. Each kind is read from its
+(user, updated_at) index starting just after the cursor, LIMIT + 1 rows at a
+time, and the four reads are merged. A sync therefore costs four index range
+scans sized by what changed, whatever the size of the account.
+
+Entries newer than SYNC_SETTLE_SECONDS are held back until the next sync. A
+transaction that stamped updated_at but had not committed yet when it was read
+would otherwise be skipped for good. A response with nothing more to send ends
+at the settle point itself, even when it had no entries. Clients should upsert rows by primary key.
+A row can come back again after a later change, and a tombstone can name a row
+the client never saw.
+"""
+import heapq
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Category, Reminder, Task, Tombstone
+from .serializers import ReminderValuesSerializer, TaskValuesSerializer, ValuesSerializer
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class CursorError(ValueError):
+    pass
+
+
+class SyncTaskSerializer(TaskValuesSerializer):
+    fields = {**TaskValuesSerializer.fields, 'created_at': 'created_at', 'updated_at': 'updated_at'}
+
+
+class SyncReminderSerializer(ReminderValuesSerializer):
+    fields = {**ReminderValuesSerializer.fields, 'updated_at': 'updated_at'}
+
+
+class SyncCategorySerializer(ValuesSerializer):
+    fields = {'id': 'id', 'name': 'name', 'created_at': 'created_at', 'updated_at': 'updated_at'}
+
+
+class TombstoneSerializer(ValuesSerializer):
+    fields = {'seq': 'id', 'kind': 'kind', 'id': 'object_id', 'deleted_at': 'deleted_at'}
+
+
+# (response key, model, serializer, timestamp field, primary key in the rows), in kind order
+STREAMS = (
+    ('tasks', Task, SyncTaskSerializer, 'updated_at', 'uid'),
+    ('reminders', Reminder, SyncReminderSerializer, 'updated_at', 'uid'),
+    ('categories', Category, SyncCategorySerializer, 'updated_at', 'id'),
+    ('deleted', Tombstone, TombstoneSerializer, 'deleted_at', 'seq'),
+)
+
+# Tombstone kind -> (response key, model whose primary key object_id holds)
+DELETED_KINDS = {
+    Tombstone.TASK: ('tasks', Task),
+    Tombstone.REMINDER: ('reminders', Reminder),
+    Tombstone.CATEGORY: ('categories', Category),
+}
+
+
+def encode_cursor(moment, kind, pk):
+    return f'{(moment - EPOCH) // timedelta(microseconds=1)}.{kind}.{pk}'
+
+
+def decode_cursor(cursor):
+    """(datetime, kind, primary key) for a cursor from encode_cursor"""
+    try:
+        micros, kind, pk = cursor.split('.', 2)
+        kind = int(kind)
+        if not 0 <= kind < len(STREAMS):
+            raise ValueError(kind)
+        model = STREAMS[kind][1]
+        return EPOCH + timedelta(microseconds=int(micros)), kind, model._meta.pk.to_python(pk)
+    except (ValueError, ValidationError) as e:
+        # to_python raises ValidationError for malformed keys
+        raise CursorError(f'Invalid cursor: {cursor}') from e
+
+
+def cursor_expired(cursor):
+    """True when tombstones the client still needs may already have been purged"""
+    moment, _, _ = cursor
+    return moment < timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def after(kind, field, cursor):
+    """Filter for entries of `kind` that sort after `cursor`"""
+    if cursor is None:
+        return Q()
+    moment, cursor_kind, pk = cursor
+    if kind < cursor_kind:
+        return Q(**{f'{field}__gt': moment})
+    if kind > cursor_kind:
+        return Q(**{f'{field}__gte': moment})
+    return Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'pk__gt': pk})
+
+
+def changes(user, cursor=None, limit=None):
+    """
+    Up to `limit` changes after `cursor` (a decoded cursor, or None for everything).
+    Returns the response body: rows per kind, deleted ids per kind, the cursor
+    to resume from and whether more changes are waiting.
+    """
+    limit = limit or settings.SYNC_PAGE_SIZE
+    settled = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+    entries = []
+    for kind, (key, model, serializer_class, field, pk) in enumerate(STREAMS):
+        queryset = model.objects.filter(after(kind, field, cursor), user_id=user.pk, **{f'{field}__lte': settled})
+        rows = serializer_class(queryset.order_by(field, 'pk')[:limit + 1]).data
+        entries.append([(row[field], kind, row[pk], row) for row in rows])
+
+    merged = list(heapq.merge(*entries, key=lambda entry: entry[:3]))
+    page = merged[:limit]
+
+    body = {key: [] for key, *_ in STREAMS[:3]}
+    body['deleted'] = {key: [] for key, _ in DELETED_KINDS.values()}
+    for _, kind, _, row in page:
+        if kind == len(STREAMS) - 1:
+            key, model = DELETED_KINDS[row['kind']]
+            # object_id is text, ids go out typed as in the rows (category ids are integers)
+            body['deleted'][key].append(model._meta.pk.to_python(row['id']))
+        else:
+            body[STREAMS[kind][0]].append(row)
+
+    body['has_more'] = len(merged) > limit
+    if body['has_more']:
+        moment, kind, pk, _ = page[-1]
+        body['cursor'] = encode_cursor(moment, kind, pk)
+    else:
+        # Everything up to `settled` has been returned, so the next sync can start
+        # there. A quiet account's cursor then stays fresh instead of ageing with its
+        # last change until it expires, which would also make every resync a 410.
+        body['cursor'] = encode_cursor(settled, len(STREAMS) - 1, 0)
+    return body
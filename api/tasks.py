@@ -0,0 +1,129 @@
+"""
+Celery tasks for the side effects of task and reminder writes, plus the periodic sweeps.
+
+sync_task_reminders is dispatched through api.jobs once per user and request
+with every task that was saved. It is idempotent: a reminder whose main row
+already exists is skipped, so retries and redeliveries create nothing twice.
+The task rows are locked while their reminders are written, so concurrent calls
+for the same task take turns. The user's timezone is read fresh from their
+profile, since a worker process may hold a cached zone from before an edit.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.utils import timezone
+
+from users.timezones import user_zone
+
+from . import events
+from .models import Reminder, SpilledEvent, Task, Tombstone
+from .quotes import dispatch, refresh_utc_minutes
+from .scheduling import reminder_occurrences, reminder_title, snooze_offsets, snooze_title
+from .stream import publish_many, replay
+
+logger = logging.getLogger(__name__)
+
+
+def missing_reminders(task, created, existing, now, zone):
+    """
+    Unsaved Reminder rows for the occurrences `task` calls for that are not in
+    `existing`, a set of (reminder_datetime, is_snooze) keys already saved for it.
+    """
+    reminders = []
+    for reminder_datetime, reminder_type in reminder_occurrences(task, created, now=now, zone=zone):
+        if (reminder_datetime, False) in existing:
+            logger.debug(f"Main reminder already exists for {task.title} at {reminder_datetime}")
+            continue
+        existing.add((reminder_datetime, False))
+        reminders.append(Reminder(
+            user_id=task.user_id,
+            task=task,
+            title=reminder_title(task, reminder_type),
+            reminder_datetime=reminder_datetime
+        ))
+
+        for snooze_minutes in snooze_offsets(task):
+            snooze_datetime = reminder_datetime - timedelta(minutes=snooze_minutes)
+            # Only future snoozes the task does not have yet
+            if snooze_datetime <= now or (snooze_datetime, True) in existing:
+                continue
+            existing.add((snooze_datetime, True))
+            reminders.append(Reminder(
+                user_id=task.user_id,
+                task=task,
+                title=snooze_title(task, snooze_minutes),
+                reminder_datetime=snooze_datetime,
+                is_snooze=True,
+                snooze_minutes=snooze_minutes
+            ))
+    return reminders
+
+
+@shared_task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=5)
+def sync_task_reminders(user_id, items):
+    """Create the missing reminders for a user's saved tasks; items are (task uid, created) pairs"""
+    created_ids = defaultdict(bool)
+    for task_id, created in items:
+        created_ids[str(task_id)] |= created
+
+    now = timezone.now()
+    with events.deferred(), transaction.atomic():
+        tasks = list(Task.objects.select_for_update().filter(user_id=user_id, uid__in=list(created_ids)))
+        zone = user_zone(user_id, fresh=True)
+        existing = defaultdict(set)
+        for task_id, reminder_datetime, is_snooze in Reminder.objects.filter(task__in=tasks).values_list(
+            'task_id', 'reminder_datetime', 'is_snooze'
+        ):
+            existing[task_id].add((reminder_datetime, is_snooze))
+
+        reminders = []
+        for task in tasks:
+            reminders += missing_reminders(task, created_ids[str(task.uid)], existing[task.uid], now, zone)
+
+        # bulk_create sends no post_save, so the events are queued here
+        for reminder in Reminder.objects.bulk_create(reminders):
+            events.queue(reminder, 'created')
+
+    logger.debug(f"Created {len(reminders)} reminders for {len(tasks)} tasks of user {user_id}")
+    return len(reminders)
+
+
+@shared_task
+def publish_events(stream, messages):
+    """Add built messages to a stream; failures are spilled for replay by publish_many"""
+    publish_many(stream, messages)
+
+
+@shared_task
+def replay_spilled_events():
+    if SpilledEvent.objects.exists():
+        return replay()
+    return 0
+
+
+@shared_task
+def dispatch_quotes():
+    """Send the daily quotes due this minute, and any a stalled run missed"""
+    return dispatch(timezone.now())
+
+
+@shared_task
+def refresh_quote_minutes():
+    """Move quote schedules whose UTC minute changed with a DST transition"""
+    return refresh_utc_minutes(timezone.now())
+
+
+@shared_task
+def purge_tombstones(batch_size=5000):
+    """Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS, a batch per statement"""
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    purged = 0
+    while True:
+        ids = list(Tombstone.objects.filter(deleted_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return purged
+        purged += Tombstone.objects.filter(id__in=ids).delete()[0]
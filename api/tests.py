@@ -1,3 +1,479 @@
-from django.test import TestCase
+import io
+import json
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from redis.exceptions import RedisError
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from analytics.writer import writer
+from users.authentication import VersionedRefreshToken
+from users.models import Profile, User
+from users.timezones import user_zone
+
+from . import events, jobs, quotes, renderers, stream, tasks
+from .circuit_breaker import OPEN, CircuitBreaker
+from .models import Category, QuoteSchedule, Reminder, SpilledEvent, Task
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .serializers import ReminderSerializer
+from .sync import encode_cursor
+
+
+def make_user(email='ada@example.com'):
+    return User.objects.create_user(username=email.split('@')[0], email=email, password='pw12345!')
+
+
+def make_task(user, **fields):
+    fields = {
+        'title': 'Write report',
+        'description': 'Quarterly numbers',
+        'due_date': timezone.localdate() + timedelta(days=2),
+        'time': time(9, 30),
+        **fields
+    }
+    return Task.objects.create(user=user, **fields)
+
+
+def unsaved_reminder(task):
+    return Reminder(user_id=task.user_id, task=task, title=task.title, reminder_datetime=timezone.now())
+
+
+class SignalTestCase(TestCase):
+    """Publishes to a mock instead of Redis and writes task analytics inline, not from a thread"""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch('api.redis_pool._client', mock.MagicMock()),
+            mock.patch.object(writer, 'interval', 0)
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class ReminderSchedulingTests(SignalTestCase):
+    def test_reminders_use_a_timezone_changed_after_earlier_tasks(self):
+        user = make_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_task(user)
+
+        user.profile.timezone = 'America/New_York'
+        user.profile.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            task = make_task(user)
+
+        reminder = task.reminders.get()
+        self.assertEqual(
+            reminder.reminder_datetime,
+            datetime.combine(task.due_date, task.time, ZoneInfo('America/New_York'))
+        )
+
+
+class PublishBreakerTests(TestCase):
+    def test_probe_failing_outside_redis_reopens_breaker(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        with mock.patch.object(stream, 'breaker', breaker), \
+                mock.patch.object(stream, 'replay', side_effect=DatabaseError('database is locked')):
+            with self.assertRaises(DatabaseError):
+                stream.publish(stream.REMINDER_STREAM, {'event': 'created'})
+        self.assertEqual(breaker.state, OPEN)
+
+
+class ReplayTests(TestCase):
+    def setUp(self):
+        stream.spill(stream.REMINDER_STREAM, [{'n': str(n)} for n in range(3)])
+        self.redis = mock.MagicMock()
+        patcher = mock.patch.object(stream, 'get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def spilled(self):
+        return [fields['n'] for fields in SpilledEvent.objects.order_by('id').values_list('fields', flat=True)]
+
+    def test_redis_is_called_outside_the_claiming_transaction(self):
+        # TestCase's own atomic blocks are the baseline
+        outer, depths = len(connection.savepoint_ids), []
+        self.redis.pipeline.return_value.execute.side_effect = lambda: depths.append(len(connection.savepoint_ids))
+
+        self.assertEqual(stream.replay(batch_size=2), 3)
+        self.assertEqual(depths, [outer, outer])
+        self.assertEqual(self.spilled(), [])
+
+    def test_a_failed_batch_is_restored_in_order(self):
+        self.redis.pipeline.return_value.execute.side_effect = RedisError('connection reset')
+
+        with self.assertRaises(RedisError):
+            stream.replay(batch_size=2)
+        self.assertEqual(self.spilled(), ['0', '1', '2'])
+        self.assertTrue(stream._backlog.is_set())
+
+    def test_events_queue_behind_a_replay_in_progress(self):
+        with stream._replay_lock:
+            self.assertEqual(stream.publish(stream.REMINDER_STREAM, {'n': '3'}), None)
+
+        self.redis.xadd.assert_not_called()
+        self.assertEqual(self.spilled(), ['0', '1', '2', '3'])
+
+
+class QuoteDispatchTests(SignalTestCase):
+    def test_catch_up_after_midnight_sends_the_previous_days_last_buckets(self):
+        # UTC users, so scheduled_time is the UTC bucket
+        late, early = make_user(), make_user('grace@example.com')
+        QuoteSchedule.objects.create(user=late, scheduled_time=time(23, 58))
+        QuoteSchedule.objects.create(user=early, scheduled_time=time(0, 1))
+
+        with mock.patch.object(quotes, 'publish_many') as publish_many:
+            sent = quotes.dispatch(datetime(2026, 10, 20, 0, 2, tzinfo=ZoneInfo('UTC')), catch_up=5)
+
+        self.assertEqual(sent, 2)
+        messages = [message for call in publish_many.call_args_list for message in call.args[1]]
+        self.assertCountEqual(
+            [(message['user_id'], message['date']) for message in messages],
+            [(str(late.pk), '2026-10-19'), (str(early.pk), '2026-10-20')]
+        )
+        self.assertEqual(QuoteSchedule.objects.get(user=late).last_sent_on.isoformat(), '2026-10-19')
+
+    @override_settings(REDIS_SPILL_MAX_EVENTS=2, REDIS_STREAM_CAPS={quotes.QUOTE_STREAM: (10, 3)})
+    def test_each_stream_is_held_to_its_own_spill_cap(self):
+        stream.spill(stream.REMINDER_STREAM, [{'n': str(n)} for n in range(2)])
+        stream.spill(quotes.QUOTE_STREAM, [{'n': str(n)} for n in range(5)])
+        stream.spill(stream.REMINDER_STREAM, [{'n': '2'}])
+
+        spilled = SpilledEvent.objects.order_by('id').values_list('stream', 'fields')
+        self.assertEqual([(name, fields['n']) for name, fields in spilled], [
+            ('reminders', '1'), ('quotes', '2'), ('quotes', '3'), ('quotes', '4'), ('reminders', '2')
+        ])
+        self.assertEqual(stream.trim_options(quotes.QUOTE_STREAM)['maxlen'], 10)
+
+
+class JSONRenderingTests(SignalTestCase):
+    payload = {
+        'uid': uuid.UUID('5f0c8f3e-2c4b-4a8e-9a53-2f4d6c1e7b90'),
+        'moments': [
+            datetime(2026, 3, 8, 7, 0, 0, 123456, tzinfo=ZoneInfo('UTC')),
+            datetime(2026, 3, 8, 2, 30, tzinfo=ZoneInfo('America/New_York')),
+        ],
+        'day': date(2026, 3, 8),
+        'time': time(9, 30, 15, 500),
+        'amount': Decimal('12.50'),
+        'counts': {1: 2, 7: 0},
+        'text': 'caf\u00e9 \u2603',
+        'empty': [],
+    }
+
+    def test_orjson_and_the_stdlib_write_the_same_bytes(self):
+        self.assertIsNotNone(renderers.orjson)
+        for indent in (None, 2):
+            self.assertEqual(
+                renderers.orjson_dumps(self.payload, indent=indent),
+                renderers.stdlib_dumps(self.payload, indent=indent)
+            )
+
+    def test_line_separators_are_escaped(self):
+        rendered = FastJSONRenderer().render({'title': 'one\u2028two\u2029three'})
+
+        self.assertEqual(rendered, b'{"title":"one\\u2028two\\u2029three"}')
+
+    def test_indent_from_the_accept_header(self):
+        rendered = FastJSONRenderer().render({'a': [1]}, 'application/json; indent=4')
+
+        self.assertIn(b'\n', rendered)
+        self.assertEqual(json.loads(rendered), {'a': [1]})
+
+    def test_reminder_serializer_hands_over_native_values(self):
+        user = make_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            task = make_task(user)
+        reminder = task.reminders.get()
+
+        data = ReminderSerializer(reminder).data
+        self.assertIsInstance(data['user_id'], uuid.UUID)
+        self.assertIsInstance(data['reminder_datetime'], datetime)
+
+        body = json.loads(FastJSONRenderer().render(data))
+        self.assertEqual(body['user_id'], str(user.pk))
+        self.assertEqual(body['task_id'], str(reminder.task_id))
+        self.assertEqual(body['reminder_datetime'], reminder.reminder_datetime.isoformat())
+
+
+class JSONParsingTests(SignalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user())
+
+    def post(self, body, content_type='application/json'):
+        return self.client.generic('POST', '/api/categories/', body, content_type=content_type)
+
+    def test_malformed_bodies_are_a_400(self):
+        self.assertEqual(self.post(b'{"name": ').status_code, 400)
+        self.assertEqual(self.post(b'{"name": "\xff"}').status_code, 400)
+
+    def test_unknown_charsets_are_parse_errors(self):
+        # Django drops charsets it does not know, so this only reaches the parser from other callers
+        with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+            FastJSONParser().parse(io.BytesIO(b'{"name": "Work"}'), parser_context={'encoding': 'no-such-charset'})
+
+    def test_other_charsets_are_decoded_first(self):
+        response = self.post('{"name": "Caf\u00e9"}'.encode('latin-1'), 'application/json; charset=latin-1')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['name'], 'Caf\u00e9')
+
+
+class ReminderEventTests(SignalTestCase):
+    def test_events_are_merged_per_reminder_within_a_scope(self):
+        task = make_task(make_user())
+        new, dropped = unsaved_reminder(task), unsaved_reminder(task)
+        with mock.patch('api.tasks.publish_events.delay') as delay:
+            with events.deferred(), self.captureOnCommitCallbacks(execute=True):
+                for action in ('created', 'rescheduled', 'updated'):
+                    events.queue(new, action)
+                for action in ('created', 'cancelled'):
+                    events.queue(dropped, action)
+
+        delay.assert_called_once()
+        stream_name, messages = delay.call_args.args
+        self.assertEqual(stream_name, stream.REMINDER_STREAM)
+        self.assertEqual([(m['reminder_id'], m['action']) for m in messages], [(str(new.uid), 'created')])
+
+    def test_rolled_back_writes_publish_nothing(self):
+        task = make_task(make_user())
+        reminder = unsaved_reminder(task)
+        with mock.patch('api.tasks.publish_events.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        events.queue(reminder, 'created')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+
+        delay.assert_not_called()
+
+
+class JobTests(SignalTestCase):
+    def test_tasks_saved_in_one_scope_share_one_celery_call(self):
+        user = make_user()
+        with mock.patch.object(tasks.sync_task_reminders, 'delay') as delay:
+            with jobs.deferred(), self.captureOnCommitCallbacks(execute=True):
+                saved = [make_task(user) for _ in range(3)]
+                saved[0].title = 'Edited'
+                saved[0].save()
+
+        items = [(str(task.uid), True) for task in saved] + [(str(saved[0].uid), False)]
+        delay.assert_called_once_with(str(user.pk), items)
+
+
+    def test_workers_read_the_timezone_the_profile_has_now(self):
+        user = make_user()
+        with mock.patch.object(tasks.sync_task_reminders, 'delay'):
+            task = make_task(user)
+        # Another process changed the profile; this one's cache still holds UTC
+        user_zone(user.pk)
+        Profile.objects.filter(user=user).update(timezone='America/New_York')
+
+        tasks.sync_task_reminders(str(user.pk), [(str(task.uid), True)])
+
+        self.assertEqual(
+            task.reminders.get().reminder_datetime,
+            datetime.combine(task.due_date, task.time, ZoneInfo('America/New_York'))
+        )
+
+
+class RescheduleTests(SignalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = make_task(self.user, snooze_times=[15])
+        self.before = dict(self.task.reminders.values_list('uid', 'reminder_datetime'))
+
+    def test_moving_a_task_shifts_its_reminders_in_place(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/tasks/{self.task.uid}/', {'time': '11:00'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        after = dict(self.task.reminders.values_list('uid', 'reminder_datetime'))
+        self.assertEqual(len(self.before), 2)
+        self.assertEqual(after, {uid: moment + timedelta(minutes=90) for uid, moment in self.before.items()})
+
+    def test_adding_a_snooze_only_creates_the_new_reminder(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/tasks/{self.task.uid}/', {'snooze_times': [15, 60]}, format='json')
+
+        after = dict(self.task.reminders.values_list('uid', 'reminder_datetime'))
+        self.assertEqual(len(after), 3)
+        self.assertLessEqual(self.before.items(), after.items())
+
+
+class GraphQLLimitTests(SignalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.token = VersionedRefreshToken.for_user(self.user).access_token
+
+    def execute(self, query):
+        return self.client.post(
+            '/graphql/', {'query': query}, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+
+    def test_allows_a_bounded_query(self):
+        make_task(self.user)
+        response = self.execute('{ tasks(limit: 20) { title reminders { title } category { name } } }')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['tasks'][0]['title'], 'Write report')
+
+    def test_task_reminders_are_paged(self):
+        task = make_task(self.user)
+        start = timezone.now()
+        Reminder.objects.bulk_create([
+            Reminder(user=self.user, task=task, title=f'Reminder {n}', reminder_datetime=start + timedelta(hours=n))
+            for n in range(12)
+        ])
+        query = '{ tasks { first: reminders { title } all: reminders(limit: 500) { title } } }'
+        task_data = self.execute(query).json()['data']['tasks'][0]
+
+        self.assertEqual([r['title'] for r in task_data['first']], [f'Reminder {n}' for n in range(10)])
+        self.assertEqual(len(task_data['all']), 12)
+
+    def test_rejects_queries_nested_too_deep(self):
+        nested = 'title'
+        for _ in range(4):
+            nested = f'task {{ reminders {{ {nested} }} }}'
+        response = self.execute(f'{{ tasks {{ reminders {{ {nested} }} }} }}')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exceeds maximum operation depth', response.json()['errors'][0]['message'])
+
+    def test_rejects_queries_over_the_cost_budget(self):
+        # 1 tasks + 100 reminders + 100 * 10 task + 1000 reminders + 1000 * 10 title
+        response = self.execute('{ tasks(limit: 100) { reminders { task { reminders { title } } } } }')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Query cost 12101 exceeds the maximum', response.json()['errors'][0]['message'])
+
+
+class SparseFieldsTests(SignalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task = make_task(self.user)
+
+    def test_lists_return_only_the_requested_fields(self):
+        response = self.client.get('/api/tasks/', {'fields': 'uid,title'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'uid': str(self.task.uid), 'title': 'Write report'}])
+
+    def test_detail_reads_drop_the_other_fields(self):
+        response = self.client.get(f'/api/tasks/{self.task.uid}/', {'fields': 'title'})
+
+        self.assertEqual(response.json(), {'title': 'Write report'})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/reminders/', {'fields': 'uid,owner'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': 'Unknown fields: owner'})
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(SignalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(user=self.user, name='Work')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks = [make_task(self.user, category=self.category) for _ in range(3)]
+        make_task(make_user('grace@example.com'))
+
+    def sync(self, **params):
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_return_every_change_once(self):
+        seen = {'tasks': [], 'reminders': [], 'categories': []}
+        body = {'cursor': None, 'has_more': True}
+        while body['has_more']:
+            body = self.sync(limit=2, **({'since': body['cursor']} if body['cursor'] else {}))
+            for key, rows in seen.items():
+                rows += [row.get('uid', row.get('id')) for row in body[key]]
+
+        self.assertEqual(seen['tasks'], list(dict.fromkeys(seen['tasks'])))
+        self.assertCountEqual(seen['tasks'], [str(task.uid) for task in self.tasks])
+        reminders = Reminder.objects.filter(user=self.user).values_list('uid', flat=True)
+        self.assertCountEqual(seen['reminders'], [str(uid) for uid in reminders])
+        self.assertEqual(seen['categories'], [self.category.pk])
+        self.assertEqual(self.sync(since=body['cursor'])['tasks'], [])
+
+    def test_deletions_come_back_as_tombstones(self):
+        cursor = self.sync()['cursor']
+        doomed, category_id = self.tasks[0], self.category.pk
+        reminders = [str(uid) for uid in doomed.reminders.values_list('uid', flat=True)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/tasks/{doomed.uid}/')
+            self.category.delete()
+
+        body = self.sync(since=cursor)
+        self.assertEqual(body['deleted'], {
+            'tasks': [str(doomed.uid)], 'reminders': reminders, 'categories': [category_id]
+        })
+        # SET_NULL does not save the tasks, the category delete touches them
+        self.assertCountEqual([(row['uid'], row['category']) for row in body['tasks']], [
+            (str(task.uid), None) for task in self.tasks[1:]
+        ])
+
+    def test_changes_inside_the_settle_window_are_held_back(self):
+        with override_settings(SYNC_SETTLE_SECONDS=60):
+            body = self.sync()
+        self.assertEqual((body['tasks'], body['has_more']), ([], False))
+
+        later = self.sync(since=body['cursor'])
+        self.assertCountEqual([row['uid'] for row in later['tasks']], [str(task.uid) for task in self.tasks])
+
+    @override_settings(SYNC_SETTLE_SECONDS=5)
+    def test_a_late_commit_inside_the_window_is_still_synced(self):
+        Task.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        cursor = self.sync()['cursor']
+        # Stamped before that sync ran, committed after it
+        late = self.tasks[0]
+        Task.objects.filter(pk=late.pk).update(title='Late', updated_at=timezone.now() - timedelta(seconds=3))
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=5)):
+            body = self.sync(since=cursor)
+        self.assertEqual([row['title'] for row in body['tasks']], ['Late'])
+
+    def test_quiet_accounts_keep_a_fresh_cursor(self):
+        old = encode_cursor(timezone.now() - timedelta(days=29), 0, self.tasks[0].uid)
+        Task.objects.update(updated_at=timezone.now() - timedelta(days=29, hours=1))
+        Reminder.objects.update(updated_at=timezone.now() - timedelta(days=29, hours=1))
+        Category.objects.update(updated_at=timezone.now() - timedelta(days=29, hours=1))
+
+        cursor = self.sync(since=old)['cursor']
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(days=2)):
+            response = self.client.get('/api/sync/', {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+
+    def test_rejects_malformed_and_expired_cursors(self):
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'garbage'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/sync/', {'since': '1.9.x'}).status_code, 400)
+
+        expired = encode_cursor(timezone.now() - timedelta(days=31), 0, self.tasks[0].uid)
+        self.assertEqual(self.client.get('/api/sync/', {'since': expired}).status_code, 410)
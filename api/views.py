@@ -1,10 +1,17 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from .models import Task, Reminder, QuoteSchedule, Category
 from rest_framework.response import Response
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count, Q
-from .utils import publish_to_redis
+from . import events
+from .mixins import AtomicWritesMixin, SparseFieldsMixin
+from .rescheduling import reschedule_reminders, schedule_changed, schedule_snapshot
+from .scheduling import local_day_range
+from .sync import CursorError, changes, cursor_expired, decode_cursor
+from users.timezones import user_zone
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,7 +21,9 @@ from .serializers import (
     QuoteScheduleSerializer,
     CategorySerializer,
     TaskDetailSerializer,
-    ReminderDetailSerializer
+    ReminderDetailSerializer,
+    TaskValuesSerializer,
+    ReminderValuesSerializer
 )
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -56,7 +65,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         } for cat in categories]
         return Response(data)
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(AtomicWritesMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing tasks.
     Provides CRUD operations and additional actions for task management.
@@ -66,6 +75,7 @@ class TaskViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'category__name']
     ordering_fields = ['due_date', 'priority', 'created_at']
     ordering = ['-created_at']
+    values_serializer_class = TaskValuesSerializer
 
     def get_serializer_class(self):
         if self.action in ['retrieve', 'update', 'partial_update']:
@@ -106,8 +116,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         # Notify Redis about each reminder being cancelled
         for reminder in active_reminders:
-            if not publish_to_redis(reminder, action='cancelled'):
-                logger.error(f"Failed to publish reminder cancellation {reminder.uid} to Redis")
+            events.queue(reminder, 'cancelled')
         
         # Log the deletion
         logger.info(f"Task deleted: {instance.title} (ID: {instance.uid})")
@@ -118,51 +127,23 @@ class TaskViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_update(self, serializer):
-        """Handle task updates and reschedule reminders if needed"""
-        # Get the original task before update
-        original_task = self.get_object()
-        original_due_date = original_task.due_date
-        original_time = original_task.time
-        
-        # Save the updated task
-        task = serializer.save()
-        
-        # Check if due_date or time has changed
-        if (task.due_date != original_due_date or 
-            task.time != original_time):
-            
-            logger.info(f"Task {task.uid} schedule updated: {task.due_date} {task.time}")
-            
-            # Store existing reminders for notification
-            future_reminders = list(task.reminders.filter(
-                reminder_datetime__gt=timezone.now(),
-                sent=False
-            ))
-            
-            # Store original datetimes before deletion
-            for reminder in future_reminders:
-                reminder.original_datetime = reminder.reminder_datetime
-            
-            # Delete existing future reminders
-            task.reminders.filter(
-                reminder_datetime__gt=timezone.now(),
-                sent=False
-            ).delete()
-            
-            # Create new reminders based on updated schedule
-            from .signals import create_reminder_from_task
-            create_reminder_from_task(sender=Task, instance=task, created=False)
-            
-            # Get new reminders and notify Redis about the schedule change
-            new_reminders = task.reminders.filter(reminder_datetime__gt=timezone.now())
-            
-            # Notify Redis about each rescheduled reminder
-            from .utils import publish_to_redis
-            for reminder in new_reminders:
-                if not publish_to_redis(reminder, action='rescheduled'):
-                    logger.error(f"Failed to publish rescheduled reminder {reminder.uid} to Redis")
-            
-            logger.info(f"Successfully rescheduled {new_reminders.count()} reminders for task {task.uid}")
+        """Handle task updates and move the task's reminders if its schedule changed"""
+        task = serializer.instance
+        previous = schedule_snapshot(task)
+
+        if not schedule_changed(previous, serializer.validated_data):
+            serializer.save()
+            return
+
+        # The reminders are diffed below, so the post_save signal must not materialize them too
+        task._skip_reminder_sync = True
+        try:
+            task = serializer.save()
+        finally:
+            task._skip_reminder_sync = False
+
+        logger.info(f"Task {task.uid} schedule updated: {task.due_date} {task.time}")
+        reschedule_reminders(task, previous)
 
     @action(detail=True, methods=['post'])
     def mark_completed(self, request, pk=None):
@@ -176,13 +157,11 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         # Mark all associated reminders as completed and notify Redis
         reminders = task.reminders.all()
-        reminders.update(is_completed=True, sent=True)
+        reminders.update(is_completed=True, sent=True, updated_at=timezone.now())
         
         # Notify Redis about completed reminders
-        from .utils import publish_to_redis
         for reminder in reminders:
-            if not publish_to_redis(reminder, action='completed'):
-                logger.error(f"Failed to publish completed reminder {reminder.uid} to Redis")
+            events.queue(reminder, 'completed')
         
         return Response({"status": "task and associated reminders marked as completed"})
 
@@ -200,18 +179,18 @@ class TaskViewSet(viewsets.ModelViewSet):
     def upcoming(self, request):
         """Get upcoming tasks"""
         days = int(request.query_params.get('days', 7))
-        due_date = timezone.now().date() + timezone.timedelta(days=days)
+        today = timezone.localdate(timezone=user_zone(request.user.pk))
+        due_date = today + timezone.timedelta(days=days)
         
         tasks = self.get_queryset().filter(
             completed=False,
             due_date__lte=due_date,
-            due_date__gte=timezone.now().date()
+            due_date__gte=today
         ).order_by('due_date', 'time')
         
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
+        return self.values_response(tasks)
 
-class ReminderViewSet(viewsets.ModelViewSet):
+class ReminderViewSet(AtomicWritesMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing reminders.
     Provides CRUD operations and additional actions for reminder management.
@@ -221,6 +200,7 @@ class ReminderViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'task__title']
     ordering_fields = ['reminder_datetime', 'created_at']
     ordering = ['reminder_datetime']
+    values_serializer_class = ReminderValuesSerializer
 
     def get_serializer_class(self):
         if self.action in ['retrieve', 'update', 'partial_update']:
@@ -249,8 +229,7 @@ class ReminderViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         reminder = serializer.save(user=self.request.user)
-        if not publish_to_redis(reminder, action='created'):
-            logger.error(f"Failed to publish reminder {reminder.uid} to Redis")
+        events.queue(reminder, 'created')
 
     def perform_update(self, serializer):
         """Handle reminder updates and reschedule if datetime changed"""
@@ -268,12 +247,10 @@ class ReminderViewSet(viewsets.ModelViewSet):
             reminder.original_datetime = original_datetime
             
             # Publish rescheduled action to Redis
-            if not publish_to_redis(reminder, action='rescheduled'):
-                logger.error(f"Failed to publish rescheduled reminder {reminder.uid} to Redis")
+            events.queue(reminder, 'rescheduled')
         else:
             # If only other fields were updated
-            if not publish_to_redis(reminder, action='updated'):
-                logger.error(f"Failed to publish reminder update {reminder.uid} to Redis")
+            events.queue(reminder, 'updated')
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -298,8 +275,7 @@ class ReminderViewSet(viewsets.ModelViewSet):
         reminder.save()
         
         # Notify Redis about cancellation
-        if not publish_to_redis(reminder, action='cancelled'):
-            logger.error(f"Failed to publish reminder cancellation {reminder.uid} to Redis")
+        events.queue(reminder, 'cancelled')
         
         return Response({"status": "reminder cancelled successfully"})
 
@@ -312,7 +288,7 @@ class ReminderViewSet(viewsets.ModelViewSet):
         try:
             new_datetime = timezone.datetime.fromisoformat(request.data.get('reminder_datetime'))
             if timezone.is_naive(new_datetime):
-                new_datetime = timezone.make_aware(new_datetime)
+                new_datetime = timezone.make_aware(new_datetime, user_zone(request.user.pk))
         except (ValueError, TypeError):
             return Response(
                 {"error": "Invalid datetime format. Please use ISO format (YYYY-MM-DDTHH:MM:SS)"},
@@ -344,8 +320,7 @@ class ReminderViewSet(viewsets.ModelViewSet):
         reminder.original_datetime = original_datetime
         
         # Notify Redis about rescheduling
-        if not publish_to_redis(reminder, action='rescheduled'):
-            logger.error(f"Failed to publish rescheduled reminder {reminder.uid} to Redis")
+        events.queue(reminder, 'rescheduled')
         
         return Response({
             "status": "reminder rescheduled successfully",
@@ -363,37 +338,34 @@ class ReminderViewSet(viewsets.ModelViewSet):
         reminder.is_completed = True
         reminder.save()
         
-        if not publish_to_redis(reminder, action='sent'):
-            logger.error(f"Failed to publish reminder sent status {reminder.uid} to Redis")
+        events.queue(reminder, 'sent')
             
         return Response({"status": "reminder marked as sent"})
 
     @action(detail=False, methods=['get'])
     def today(self, request):
         """Get today's reminders"""
-        today = timezone.now().date()
+        zone = user_zone(request.user.pk)
+        # A range on the user's local day instead of __date, which uses the server zone and skips the index
+        start, end = local_day_range(timezone.localdate(timezone=zone), zone)
         reminders = self.get_queryset().filter(
-            reminder_datetime__date=today,
+            reminder_datetime__gte=start,
+            reminder_datetime__lt=end,
             is_completed=False,
             is_active=True  # Only get active reminders
         ).order_by('reminder_datetime')
         
-        serializer = self.get_serializer(reminders, many=True)
-        return Response(serializer.data)
+        return self.values_response(reminders)
 
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Get overdue reminders"""
         now = timezone.now()
-        reminders = self.get_queryset().filter(
-            reminder_datetime__lt=now,
-            is_completed=False,
-            sent=False,
-            is_active=True  # Only get active reminders
+        reminders = self.get_queryset().pending().filter(
+            reminder_datetime__lt=now
         ).order_by('reminder_datetime')
         
-        serializer = self.get_serializer(reminders, many=True)
-        return Response(serializer.data)
+        return self.values_response(reminders)
 
 class QuoteScheduleViewSet(viewsets.ModelViewSet):
     """ViewSet for managing quote schedules."""
@@ -408,3 +380,34 @@ class QuoteScheduleViewSet(viewsets.ModelViewSet):
         if QuoteSchedule.objects.filter(user=self.request.user).exists():
             raise serializer.ValidationError({"error": "You already have a quote schedule"})
         serializer.save(user=self.request.user)
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """
+    Delta sync for offline clients.
+    GET /api/sync/ returns everything; pass the returned cursor as ?since= to get
+    only what changed after it, and keep going while has_more is true.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        cursor = None
+        since = request.query_params.get('since')
+        if since:
+            try:
+                cursor = decode_cursor(since)
+            except CursorError as e:
+                raise ValidationError({'since': str(e)})
+            if cursor_expired(cursor):
+                return Response(
+                    {"detail": "Cursor is older than the deletion history, sync again without since"},
+                    status=status.HTTP_410_GONE
+                )
+
+        try:
+            limit = int(request.query_params.get('limit', settings.SYNC_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer'})
+        limit = max(1, min(limit, settings.SYNC_MAX_PAGE_SIZE))
+
+        return Response(changes(request.user, cursor, limit))
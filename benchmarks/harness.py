@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / 'baselines'
+
+
+def setup_django():
+    """Configure Django for an in-process benchmark run"""
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    # Captured slow queries would be written into the database being measured
+    os.environ.setdefault('SLOW_QUERY_CAPTURE', 'False')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Run against a throwaway test database instead of db.sqlite3"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def quiet_logging():
+    """The signal handlers log at INFO on every write, which would dominate the timings"""
+    logging.disable(logging.INFO)
+
+
+class LocalRedis:
+    """
+    In-memory stand-in for the Redis client.
+    Implements the commands the app issues so publishing costs what building
+    the message costs, without a network round trip.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self._sequence = 0
+
+    def ping(self):
+        return True
+
+    def xadd(self, name, fields, id='*', maxlen=None, approximate=True, minid=None, **kwargs):
+        self._sequence += 1
+        stream_id = f'{int(time.time() * 1000)}-{self._sequence}'.encode()
+        entries = self.streams.setdefault(name, [])
+        entries.append((stream_id, fields))
+        if maxlen is not None and len(entries) > maxlen:
+            del entries[:len(entries) - maxlen]
+        if minid is not None:
+            entries[:] = [entry for entry in entries if int(entry[0].split(b'-')[0]) >= minid]
+        return stream_id
+
+    def xlen(self, name):
+        return len(self.streams.get(name, []))
+
+    def pipeline(self, transaction=True):
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [method(*args, **kwargs) for method, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def use_local_redis():
+    import api.redis_pool
+    client = LocalRedis()
+    api.redis_pool._client = client
+    return client
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, iterations=50, warmup=5):
+    """
+    Time `func` and report latency percentiles in milliseconds, queries per call
+    and bytes allocated per call. Queries and allocations are measured in a
+    separate call so their instrumentation does not skew the timings.
+    """
+    from django.db import connection
+
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    # An execute wrapper survives the query log reset Django does on request_started
+    queries = []
+    with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+        func()
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'mean_ms': round(statistics.mean(samples), 3),
+        'queries': len(queries),
+        'peak_alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def load_baseline(name):
+    path = BASELINE_DIR / f'{name}.json'
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(name, results):
+    BASELINE_DIR.mkdir(exist_ok=True)
+    path = BASELINE_DIR / f'{name}.json'
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+    return path
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compare nested {group: {case: metrics}} results with a baseline.
+    Latency regresses when p95 grows by more than `tolerance`; query counts
+    are deterministic and regress on any increase.
+    """
+    regressions = []
+    for group, cases in results.items():
+        for case, metrics in cases.items():
+            previous = (baseline or {}).get(group, {}).get(case)
+            if not previous:
+                continue
+            if metrics['queries'] > previous['queries']:
+                regressions.append(
+                    f"{group}/{case}: queries {previous['queries']} -> {metrics['queries']}"
+                )
+            if metrics['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f"{group}/{case}: p95 {previous['p95_ms']}ms -> {metrics['p95_ms']}ms"
+                )
+    return regressions
+
+
+def print_table(title, cases):
+    print(f'\n{title}')
+    header = f"{'case':<32}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'alloc KB':>11}"
+    print(header)
+    print('-' * len(header))
+    for case, m in cases.items():
+        print(
+            f"{case:<32}{m['p50_ms']:>10.2f}{m['p95_ms']:>10.2f}{m['p99_ms']:>10.2f}"
+            f"{m['queries']:>9}{m['peak_alloc_kb']:>11.1f}"
+        )
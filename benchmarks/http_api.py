@@ -0,0 +1,145 @@
+"""
+Latency, query and allocation benchmarks for the REST API.
+
+Requests go through the real URLconf, middleware, JWT authentication and
+signal handlers via the Django test client, against generated datasets.
+Redis is replaced by an in-memory stand-in. Write cases run before the
+read cases and grow the dataset, so compare runs made with the same
+--iterations.
+
+    python -m benchmarks.http_api
+    python -m benchmarks.http_api --sizes small,large --iterations 100
+    python -m benchmarks.http_api --save-baseline
+"""
+import argparse
+import io
+import itertools
+import sys
+from datetime import timedelta
+
+from .harness import (
+    compare,
+    load_baseline,
+    measure,
+    print_table,
+    quiet_logging,
+    save_baseline,
+    setup_django,
+    test_database,
+    use_local_redis,
+)
+
+BASELINE_NAME = 'http_api'
+
+# Tasks per user for each dataset size; every size has the same number of users
+DATASETS = {
+    'small': 20,
+    'medium': 200,
+    'large': 1000,
+}
+USERS_PER_DATASET = 20
+
+
+def build_cases(client):
+    from django.utils import timezone
+
+    due_date = (timezone.localdate() + timedelta(days=7)).isoformat()
+    counter = itertools.count()
+
+    def create_task():
+        response = client.post('/api/tasks/', {
+            'title': f'Benchmark task {next(counter)}',
+            'description': 'Created by the HTTP benchmark',
+            'due_date': due_date,
+            'time': '09:30:00',
+            'priority': 'high',
+            'daily_reminder': True,
+            'snooze_times': [10, 30],
+        }, format='json')
+        assert response.status_code == 201, response.content
+
+    def get(path):
+        def request():
+            response = client.get(path)
+            assert response.status_code == 200, response.content
+        return request
+
+    return {
+        'POST tasks (fan-out)': create_task,
+        'GET reminders': get('/api/reminders/'),
+        'GET reminders/today': get('/api/reminders/today/'),
+        'GET reminders/overdue': get('/api/reminders/overdue/'),
+        'GET profile/me': get('/api/profile/me/'),
+        'GET categories/stats': get('/api/categories/stats/'),
+        'GET analytics/daily_summary': get('/api/analytics/daily_summary/'),
+        'GET analytics/category_perf': get('/api/analytics/category_performance/'),
+        'GET analytics/trend': get('/api/analytics/productivity_trend/'),
+        'GET analytics/streaks': get('/api/analytics/completion_streaks/'),
+    }
+
+
+def run_dataset(size, tasks_per_user, iterations, seed):
+    from django.core.management import call_command
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from users.models import User
+
+    call_command('flush', interactive=False, verbosity=0)
+    call_command(
+        'generate_load_data',
+        users=USERS_PER_DATASET,
+        tasks_per_user=tasks_per_user,
+        seed=seed,
+        stdout=io.StringIO(),
+    )
+
+    user = User.objects.order_by('email').first()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    return {
+        name: measure(case, iterations=iterations)
+        for name, case in build_cases(client).items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='small,medium', help=f"Comma separated subset of {', '.join(DATASETS)}")
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 growth before flagging a regression')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    quiet_logging()
+    use_local_redis()
+
+    results = {}
+    with test_database():
+        for size in args.sizes.split(','):
+            results[size] = run_dataset(size, DATASETS[size], args.iterations, args.seed)
+            print_table(f'{size} ({USERS_PER_DATASET} users x {DATASETS[size]} tasks)', results[size])
+
+    if args.save_baseline:
+        print(f'\nBaseline written to {save_baseline(BASELINE_NAME, results)}')
+        return 0
+
+    baseline = load_baseline(BASELINE_NAME)
+    if baseline is None:
+        print('\nNo baseline stored yet, run with --save-baseline to create one')
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print('\nRegressions against baseline:')
+        for regression in regressions:
+            print(f'  {regression}')
+        return 1
+    print('\nNo regressions against baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
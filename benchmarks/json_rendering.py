@@ -0,0 +1,68 @@
+"""
+JSON rendering and parsing of 10k-row responses.
+
+Renders the reminder list, as the values() fast path returns it (native UUID
+and datetime values), with DRF's stock JSONRenderer and with api.renderers on
+both of its backends. It then parses the rendered body back with DRF's
+JSONParser and api.parsers.FastJSONParser. Everything runs in memory;
+the database is only used to build the rows.
+
+    python -m benchmarks.json_rendering
+    python -m benchmarks.json_rendering --rows 10000 --iterations 20
+"""
+import argparse
+import io
+import sys
+
+from .harness import measure, print_table, quiet_logging, setup_django, test_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    quiet_logging()
+
+    from django.core.management import call_command
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from api import renderers
+    from api.models import Reminder
+    from api.parsers import FastJSONParser
+    from api.serializers import ReminderValuesSerializer
+
+    with test_database():
+        users = max(1, args.rows // 500)
+        call_command('generate_load_data', users=users, tasks_per_user=500, seed=args.seed, stdout=io.StringIO())
+        rows = ReminderValuesSerializer(Reminder.objects.order_by('reminder_datetime')[:args.rows]).data
+        assert len(rows) == args.rows, len(rows)
+
+    render_cases = {
+        'DRF JSONRenderer': lambda: JSONRenderer().render(rows),
+        'FastJSONRenderer (stdlib)': lambda: renderers.stdlib_dumps(rows),
+    }
+    if renderers.orjson is not None:
+        render_cases['FastJSONRenderer (orjson)'] = lambda: renderers.orjson_dumps(rows)
+    print_table(
+        f'render ({args.rows} rows)',
+        {case: measure(func, iterations=args.iterations) for case, func in render_cases.items()}
+    )
+
+    body = renderers.dumps(rows)
+    parse_cases = {
+        'DRF JSONParser': lambda: JSONParser().parse(io.BytesIO(body)),
+        'FastJSONParser': lambda: FastJSONParser().parse(io.BytesIO(body)),
+    }
+    print_table(
+        f'parse ({len(body) / 1024 / 1024:.1f} MiB)',
+        {case: measure(func, iterations=args.iterations) for case, func in parse_cases.items()}
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Daily quote dispatch at scale.
+
+Generates users with quote schedules clustered the way people pick times:
+most at 08:00 local, the rest on other round hours and quarter hours, across
+a handful of timezones. Then times the hourly utc_minute refresh and the
+dispatch of the busiest minute bucket, against an in-memory Redis.
+
+    python -m benchmarks.quote_dispatch
+    python -m benchmarks.quote_dispatch --users 20000 --iterations 3
+"""
+import argparse
+import io
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+
+from .harness import quiet_logging, setup_django, test_database, use_local_redis
+
+TIMEZONES = ['UTC', 'Europe/London', 'America/New_York', 'Asia/Tokyo']
+
+
+def scheduled_time(rng):
+    kind = rng.random()
+    if kind < 0.6:
+        return dt_time(8, 0)
+    if kind < 0.85:
+        return dt_time(rng.choice([6, 7, 9, 12, 18, 21]), 0)
+    return dt_time(rng.randint(5, 22), rng.choice([15, 30, 45]))
+
+
+def populate(users, seed):
+    from django.core.management import call_command
+    from django.db.models import F
+    from django.db.models.functions import Mod
+    from api.models import QuoteSchedule
+    from users.models import Profile, User
+
+    call_command('generate_load_data', users=users, tasks_per_user=0, seed=seed, stdout=io.StringIO())
+
+    for index, name in enumerate(TIMEZONES[1:], start=1):
+        Profile.objects.alias(bucket=Mod(F('id'), len(TIMEZONES))).filter(bucket=index).update(timezone=name)
+
+    # bulk_create skips save(), so the refresh below fills in utc_minute
+    rng = random.Random(seed)
+    user_ids = User.objects.values_list('uid', flat=True)
+    QuoteSchedule.objects.bulk_create(
+        [QuoteSchedule(user_id=user_id, scheduled_time=scheduled_time(rng)) for user_id in user_ids],
+        batch_size=5000
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    quiet_logging()
+    redis = use_local_redis()
+
+    from django.db import connection
+    from django.db.models import Count
+    from api.models import QuoteSchedule
+    from api.quotes import QUOTE_STREAM, dispatch, refresh_utc_minutes
+
+    with test_database():
+        started = time.perf_counter()
+        populate(args.users, args.seed)
+        print(f'Generated {args.users} users with quote schedules in {time.perf_counter() - started:.1f}s')
+
+        now = datetime.now(dt_timezone.utc)
+        started = time.perf_counter()
+        refresh_utc_minutes(now)
+        print(f'Initial utc_minute refresh: {(time.perf_counter() - started) * 1000:.0f}ms')
+
+        started = time.perf_counter()
+        refresh_utc_minutes(now)
+        print(f'Hourly refresh, nothing moved: {(time.perf_counter() - started) * 1000:.0f}ms')
+
+        busiest = (
+            QuoteSchedule.objects.values('utc_minute')
+            .annotate(users=Count('uid')).order_by('-users').first()
+        )
+        minute = busiest['utc_minute']
+        tick = now.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+        print(f"Busiest bucket {tick:%H:%M} UTC with {busiest['users']} users")
+
+        samples = []
+        for _ in range(args.iterations):
+            QuoteSchedule.objects.update(last_sent_on=None)
+            redis.streams.pop(QUOTE_STREAM, None)
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *a: queries.append(sql) or execute(sql, *a)):
+                started = time.perf_counter()
+                sent = dispatch(tick, catch_up=0)
+                samples.append(time.perf_counter() - started)
+            assert sent == busiest['users'] == redis.xlen(QUOTE_STREAM), (sent, redis.xlen(QUOTE_STREAM))
+
+        mean = statistics.mean(samples)
+        print(
+            f'Dispatch: mean {mean * 1000:.0f}ms, max {max(samples) * 1000:.0f}ms, '
+            f'{sent / mean:,.0f} quotes/s, {len(queries)} queries'
+        )
+        # A second tick in the same minute finds nothing left to send
+        assert dispatch(tick, catch_up=0) == 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Serialization cost of the task and reminder list endpoints per 10k rows.
+
+Compares the DRF ModelSerializers the lists used to run, once as the views
+issued them (related rows fetched per row) and once with select_related, with
+the values()-based fast path, with and without a sparse `?fields=` selection.
+Timings include the queries, as a list request pays for both.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 10000 --iterations 3
+"""
+import argparse
+import io
+import sys
+
+from .harness import measure, print_table, quiet_logging, setup_django, test_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    quiet_logging()
+
+    from django.core.management import call_command
+    from api.models import Reminder, Task
+    from api.serializers import ReminderSerializer, ReminderValuesSerializer, TaskSerializer, TaskValuesSerializer
+
+    with test_database():
+        users = max(1, args.rows // 500)
+        call_command('generate_load_data', users=users, tasks_per_user=500, seed=args.seed, stdout=io.StringIO())
+
+        tasks = Task.objects.order_by('-created_at')[:args.rows]
+        reminders = Reminder.objects.order_by('reminder_datetime')[:args.rows]
+        assert len(tasks) == len(reminders) == args.rows, (len(tasks), len(reminders))
+
+        cases = {
+            'tasks': {
+                'ModelSerializer': lambda: TaskSerializer(tasks.all(), many=True).data,
+                'ModelSerializer+related': lambda: TaskSerializer(tasks.select_related('category'), many=True).data,
+                'values': lambda: TaskValuesSerializer(tasks.all()).data,
+                'values ?fields=3': lambda: TaskValuesSerializer(tasks.all(), ['uid', 'title', 'due_date']).data,
+            },
+            'reminders': {
+                'ModelSerializer': lambda: ReminderSerializer(reminders.all(), many=True).data,
+                'ModelSerializer+related': lambda: ReminderSerializer(
+                    reminders.select_related('user', 'task__category'), many=True
+                ).data,
+                'values': lambda: ReminderValuesSerializer(reminders.all()).data,
+                'values ?fields=3': lambda: ReminderValuesSerializer(
+                    reminders.all(), ['uid', 'reminder_datetime', 'task_title']
+                ).data,
+            },
+        }
+
+        for group, group_cases in cases.items():
+            results = {
+                case: measure(func, iterations=args.iterations, warmup=1)
+                for case, func in group_cases.items()
+            }
+            print_table(f'{group} ({args.rows} rows)', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Concurrent write throughput on SQLite, before and after tuning.
+
+Simulates several gunicorn workers (processes), each serving requests on a
+few threads, all refreshing CompletionStats rows in one database file, the
+write that task signals and profile stats reads trigger. Every configuration
+starts from a copy of the same migrated file.
+
+    python -m benchmarks.sqlite_writes
+    python -m benchmarks.sqlite_writes --processes 8 --threads 4 --writes 200
+"""
+import argparse
+import multiprocessing
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .harness import percentile, quiet_logging, setup_django
+
+CONFIGURATIONS = ('default', 'tuned', 'tuned+queue')
+
+
+def configure(name, path):
+    """Point the default connection at `path` with the options for configuration `name`"""
+    from django.db import connection
+    from config.database import sqlite_options
+    from config.write_queue import write_queue
+
+    connection.close()
+    connection.settings_dict['NAME'] = str(path)
+    connection.settings_dict['OPTIONS'] = {} if name == 'default' else sqlite_options()
+    write_queue.enabled = name == 'tuned+queue'
+
+
+def prepare_template(directory, users):
+    """Migrate a fresh database file and give it one user per writer thread"""
+    from django.core.management import call_command
+    from django.db import connection
+    from users.models import User
+
+    path = Path(directory) / 'template.sqlite3'
+    configure('default', path)
+    call_command('migrate', verbosity=0)
+    for index in range(users):
+        User.objects.create_user(email=f'writer-{index}@example.com', username=f'writer-{index}', password='x')
+    connection.close()
+    return path
+
+
+def worker(name, path, process_index, threads, writes, results):
+    from django.db import OperationalError, connection
+    from users.models import CompletionStats
+
+    configure(name, path)
+    stats_ids = list(CompletionStats.objects.order_by('id').values_list('id', flat=True))
+    connection.close()
+
+    latencies = []
+    errors = []
+
+    def serve(thread_index):
+        stats = CompletionStats.objects.select_related('profile__user').get(
+            id=stats_ids[(process_index * threads + thread_index) % len(stats_ids)]
+        )
+        for _ in range(writes):
+            started = time.perf_counter()
+            try:
+                stats.update_stats()
+            except OperationalError:
+                errors.append(1)
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+        connection.close()
+
+    pool = [threading.Thread(target=serve, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put((latencies, len(errors)))
+
+
+def run_configuration(name, template, directory, processes, threads, writes):
+    path = Path(directory) / f"{name.replace('+', '-')}.sqlite3"
+    shutil.copyfile(template, path)
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    started = time.perf_counter()
+    pool = [
+        context.Process(target=worker, args=(name, path, index, threads, writes, results))
+        for index in range(processes)
+    ]
+    for process in pool:
+        process.start()
+    collected = [results.get() for _ in pool]
+    for process in pool:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for samples, _ in collected for latency in samples]
+    return {
+        'writes_per_s': round(len(latencies) / elapsed, 1),
+        'locked_errors': sum(errors for _, errors in collected),
+        'p50_ms': round(percentile(latencies, 50), 3) if latencies else 0,
+        'p95_ms': round(percentile(latencies, 95), 3) if latencies else 0,
+        'mean_ms': round(statistics.mean(latencies), 3) if latencies else 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--processes', type=int, default=4, help='Simulated gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='Request threads per worker')
+    parser.add_argument('--writes', type=int, default=100, help='Writes per thread')
+    parser.add_argument('--configurations', default=','.join(CONFIGURATIONS))
+    args = parser.parse_args(argv)
+
+    setup_django()
+    quiet_logging()
+
+    header = f"{'configuration':<16}{'writes/s':>10}{'locked':>8}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}"
+    print(f'\n{args.processes} processes x {args.threads} threads x {args.writes} writes')
+    print(header)
+    print('-' * len(header))
+    with tempfile.TemporaryDirectory() as directory:
+        template = prepare_template(directory, args.processes * args.threads)
+        for name in args.configurations.split(','):
+            m = run_configuration(name, template, directory, args.processes, args.threads, args.writes)
+            print(
+                f"{name:<16}{m['writes_per_s']:>10.1f}{m['locked_errors']:>8}"
+                f"{m['p50_ms']:>10.2f}{m['p95_ms']:>10.2f}{m['mean_ms']:>10.2f}"
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
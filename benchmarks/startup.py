@@ -0,0 +1,55 @@
+"""
+Process startup time.
+
+Times fresh interpreters running django.setup() (what every gunicorn worker,
+Celery worker and management command pays before doing any work) and
+`manage.py check`, which also imports every admin module and URLconf.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 20
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from .harness import BASE_DIR, percentile
+
+COMMANDS = {
+    'django.setup()': [
+        sys.executable, '-c',
+        "import os, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings'); django.setup()",
+    ],
+    'manage.py check': [sys.executable, 'manage.py', 'check'],
+}
+
+
+def time_command(command, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=BASE_DIR, check=True, capture_output=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    header = f"{'command':<24}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, command in COMMANDS.items():
+        samples = time_command(command, args.runs)
+        print(
+            f"{name:<24}{percentile(samples, 50):>10.1f}{percentile(samples, 95):>10.1f}"
+            f"{statistics.mean(samples):>10.1f}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+GraphQL endpoint (/graphql/) for the Task, Reminder, Category, Profile and analytics schema.
+
+Requests authenticate with the same JWTs as the REST API, and each request gets
+its own api.loaders.Loaders so a screen's worth of nested data costs a bounded
+number of queries. Documents are rejected during validation, before anything
+runs, when they nest deeper than GRAPHQL_MAX_DEPTH or their estimated cost goes
+over GRAPHQL_MAX_COST. Every selected field costs 1 for each object it may be
+resolved on: a list field multiplies its children by its `limit` argument
+(GRAPHQL_MAX_LIST_SIZE when passed as a variable, since resolvers clamp to
+that), and relation lists without one count as GRAPHQL_DEFAULT_LIST_COST.
+"""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from graphene.validation import depth_limit_validator
+from graphene_django.views import GraphQLView
+from graphql import GraphQLError, ValidationRule, get_named_type, get_nullable_type, is_list_type, specified_rules
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode, IntValueNode
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.loaders import Loaders
+from users.authentication import CachedJWTAuthentication
+
+
+def list_size(node, field):
+    """Most items a list field can return for this selection"""
+    for argument in node.arguments:
+        if argument.name.value == 'limit':
+            if isinstance(argument.value, IntValueNode):
+                return max(0, min(int(argument.value.value), settings.GRAPHQL_MAX_LIST_SIZE))
+            return settings.GRAPHQL_MAX_LIST_SIZE
+    limit = field.args.get('limit')
+    if limit is not None and isinstance(limit.default_value, int):
+        return max(0, min(limit.default_value, settings.GRAPHQL_MAX_LIST_SIZE))
+    return settings.GRAPHQL_DEFAULT_LIST_COST
+
+
+class QueryCostRule(ValidationRule):
+    """Reject operations whose estimated cost exceeds GRAPHQL_MAX_COST"""
+
+    def enter_operation_definition(self, node, *args):
+        root = self.context.schema.get_root_type(node.operation)
+        if root is None:
+            return
+        cost = self.selection_cost(node.selection_set, root, 1, frozenset())
+        if cost > settings.GRAPHQL_MAX_COST:
+            self.report_error(GraphQLError(
+                f'Query cost {cost} exceeds the maximum of {settings.GRAPHQL_MAX_COST}.', node
+            ))
+
+    def selection_cost(self, selection_set, parent_type, multiplier, fragments):
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field = getattr(parent_type, 'fields', {}).get(selection.name.value)
+                if field is None:
+                    # Introspection and unknown fields; the latter are reported by the standard rules
+                    continue
+                cost += multiplier
+                if selection.selection_set:
+                    child = multiplier
+                    if is_list_type(get_nullable_type(field.type)):
+                        child *= list_size(selection, field)
+                    cost += self.selection_cost(selection.selection_set, get_named_type(field.type), child, fragments)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition:
+                    fragment_type = self.context.schema.get_type(selection.type_condition.name.value)
+                cost += self.selection_cost(selection.selection_set, fragment_type, multiplier, fragments)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.context.get_fragment(name)
+                # Cycles are reported by NoFragmentCyclesRule, just don't follow them
+                if fragment is None or name in fragments:
+                    continue
+                fragment_type = self.context.schema.get_type(fragment.type_condition.name.value)
+                cost += self.selection_cost(fragment.selection_set, fragment_type, multiplier, fragments | {name})
+        return cost
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class JWTGraphQLView(GraphQLView):
+    """GraphQLView authenticated by bearer JWT, with per-request loaders and query limits"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('graphiql', settings.DEBUG)
+        kwargs.setdefault('validation_rules', (
+            *specified_rules,
+            depth_limit_validator(max_depth=settings.GRAPHQL_MAX_DEPTH),
+            QueryCostRule,
+        ))
+        super().__init__(**kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except AuthenticationFailed as exc:
+            detail = exc.detail.get('detail', exc.detail) if isinstance(exc.detail, dict) else exc.detail
+            return JsonResponse({'errors': [{'message': str(detail)}]}, status=401)
+        # Only bearer tokens count, like the REST API; a session cookie alone is anonymous
+        request.user, request.auth = authenticated or (AnonymousUser(), None)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context(self, request):
+        request.loaders = Loaders(request.user)
+        return request
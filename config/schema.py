@@ -0,0 +1,12 @@
+import graphene
+
+import analytics.schema
+import api.schema
+import users.schema
+
+
+class Query(api.schema.Query, users.schema.Query, analytics.schema.Query, graphene.ObjectType):
+    pass
+
+
+schema = graphene.Schema(query=Query)
@@ -1,11 +1,14 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from django.conf import settings
 from django.conf.urls.static import static
+from users.media import serve_avatar
 from users.views import ProfileViewSet, UserViewSet
-from api.views import TaskViewSet, ReminderViewSet, QuoteScheduleViewSet, CategoryViewSet
+from api.views import TaskViewSet, ReminderViewSet, QuoteScheduleViewSet, CategoryViewSet, SyncViewSet
 from analytics.views import AnalyticsViewSet, TaskAnalyticsViewSet, CategoryPerformanceViewSet
+from monitoring.views import metrics
+from config.graphql import JWTGraphQLView
 
 # Router for user-related endpoints
 users_router = DefaultRouter()
@@ -18,6 +21,7 @@ v1_router.register(r'tasks', TaskViewSet, basename='task')
 v1_router.register(r'reminders', ReminderViewSet, basename='reminder')
 v1_router.register(r'categories', CategoryViewSet, basename='category')
 v1_router.register(r'quote-schedules', QuoteScheduleViewSet, basename='quote-schedule')
+v1_router.register(r'sync', SyncViewSet, basename='sync')
 
 v2_router = DefaultRouter()
 v2_router.register(r'analytics', AnalyticsViewSet, basename='analytics')
@@ -27,8 +31,16 @@ v2_router.register(r'category-performance', CategoryPerformanceViewSet)
 # Define the urlpatterns
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),  # Prometheus scrape endpoint
     path('api/', include(users_router.urls)),  # Users endpoints under /api/
     path('api/', include(v1_router.urls)),  # Tasks, reminders, and quote-schedules under /api/v1/
     path('api/', include(v2_router.urls)),  # Tasks, reminders, and quote-schedules under /api/v1/
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('graphql/', JWTGraphQLView.as_view(), name='graphql'),  # Tasks, reminders, categories, profile and analytics in one request
+    # Content-hashed avatars, served with immutable caching in every environment
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}avatars/(?P<prefix>[0-9a-f]{{2}})/(?P<avatar_hash>[0-9a-f]{{64}})/(?P<size>\d+)\.(?P<ext>webp|jpg)$',
+        serve_avatar,
+        name='avatar'
+    ),
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)  # Other media, DEBUG only
 
@@ -0,0 +1,101 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """
+    Single-writer queue for short, independent writes on SQLite.
+
+    SQLite allows one writer at a time, so threads writing concurrently only
+    take turns on the file lock and each pays for its own commit. Writes sent
+    through `run` are executed by one thread per process instead, which
+    drains everything queued so far into a single transaction. Each write runs
+    in its own savepoint, so one failure does not roll back the others, and
+    callers block until the group has committed.
+
+    Writes run inline when the queue is disabled, on other backends, or when
+    the caller is inside a transaction, since the writer thread cannot join it.
+    """
+
+    def __init__(self, enabled, max_batch):
+        self.enabled = enabled
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def run(self, func, *args, **kwargs):
+        if (
+            not self.enabled
+            or connection.vendor != 'sqlite'
+            or connection.in_atomic_block
+            or threading.current_thread() is self._thread
+        ):
+            return func(*args, **kwargs)
+
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((future, func, args, kwargs))
+        return future.result()
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so a gunicorn worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._run, name='sqlite-write-queue', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            # Block for the first write, then take whatever queued up behind it
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for future, func, args, kwargs in batch:
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((future, func(*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            logger.error(f"Error committing write batch: {str(e)}", exc_info=True)
+            connection.close()
+            for future, *_ in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        logger.debug(f"Committed {len(batch)} queued writes")
+
+
+write_queue = WriteQueue(
+    getattr(settings, 'SQLITE_WRITE_QUEUE', False),
+    getattr(settings, 'SQLITE_WRITE_QUEUE_MAX_BATCH', 64)
+)
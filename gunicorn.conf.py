@@ -0,0 +1,17 @@
+import os
+import shutil
+
+# Metrics from every worker are written to mmap'd files here and merged by /metrics.
+# This has to be set before any worker imports prometheus_client.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/daily-reminder-metrics')
+
+
+def on_starting(server):
+    # Samples left over from a previous master would be merged into the new ones
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,63 @@
+from django.contrib import admin
+from django.utils.html import format_html, format_html_join
+from unfold.admin import ModelAdmin
+from .models import RequestTrace, SlowQuery
+
+
+@admin.register(RequestTrace)
+class RequestTraceAdmin(ModelAdmin):
+    list_display = ('method', 'path', 'status_code', 'duration_ms', 'query_count', 'query_time_ms', 'user', 'created_at')
+    list_filter = ('method', 'status_code', 'created_at')
+    search_fields = ('path', 'user__email')
+    readonly_fields = (
+        'created_at', 'user', 'method', 'path', 'status_code',
+        'duration_ms', 'query_count', 'query_time_ms', 'span_table', 'profile_output'
+    )
+    exclude = ('spans', 'profile')
+
+    def has_add_permission(self, request):
+        return False  # Traces are only captured from live requests
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def span_table(self, obj):
+        rows = format_html_join(
+            '',
+            '<tr><td>{}</td><td>{}</td><td>{}</td><td><code>{}</code></td></tr>',
+            ((span['start_ms'], span['duration_ms'], span['kind'], span['name']) for span in obj.spans)
+        )
+        return format_html(
+            '<table><tr><th>Start ms</th><th>Duration ms</th><th>Kind</th><th>Name</th></tr>{}</table>',
+            rows
+        )
+    span_table.short_description = "Spans"
+
+    def profile_output(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.profile)
+    profile_output.short_description = "Profile"
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(ModelAdmin):
+    list_display = ('short_sql', 'count', 'total_time_ms', 'average_time_ms', 'max_time_ms', 'last_seen')
+    search_fields = ('sql', 'fingerprint')
+    readonly_fields = (
+        'fingerprint', 'sql', 'sample_sql', 'plan_output', 'count',
+        'total_time_ms', 'max_time_ms', 'first_seen', 'last_seen'
+    )
+    exclude = ('plan',)
+
+    def has_add_permission(self, request):
+        return False  # Fingerprints are only captured from executed queries
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def short_sql(self, obj):
+        return obj.sql[:120]
+    short_sql.short_description = "SQL"
+
+    def plan_output(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.plan)
+    plan_output.short_description = "Plan"
@@ -0,0 +1,17 @@
+import atexit
+
+from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from . import slow_queries
+        connection_created.connect(slow_queries.install, dispatch_uid='monitoring.slow_queries')
+        # Captures are written once the response is out, or on exit for commands and workers
+        request_finished.connect(slow_queries.flush, dispatch_uid='monitoring.slow_queries.flush')
+        atexit.register(slow_queries.flush)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from monitoring.models import SlowQuery
+
+ORDERINGS = {
+    'total': '-total_time_ms',
+    'count': '-count',
+    'max': '-max_time_ms',
+    'recent': '-last_seen',
+}
+
+
+class Command(BaseCommand):
+    help = 'Show the slowest captured query fingerprints with their EXPLAIN plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Number of fingerprints to show')
+        parser.add_argument(
+            '--order',
+            choices=sorted(ORDERINGS),
+            default='total',
+            help='Rank by total time, occurrence count, worst single run or most recently seen'
+        )
+        parser.add_argument('--no-plan', action='store_true', help='Omit the EXPLAIN output')
+        parser.add_argument('--reset', action='store_true', help='Delete every captured fingerprint')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} slow query fingerprints'))
+            return
+
+        queries = SlowQuery.objects.order_by(ORDERINGS[options['order']])[:options['top']]
+        if not queries:
+            self.stdout.write('No slow queries captured')
+            return
+
+        for rank, query in enumerate(queries, start=1):
+            self.stdout.write(self.style.WARNING(
+                f'#{rank} {query.fingerprint}  count={query.count}  total={query.total_time_ms:.1f}ms  '
+                f'avg={query.average_time_ms:.1f}ms  max={query.max_time_ms:.1f}ms  last={query.last_seen:%Y-%m-%d %H:%M}'
+            ))
+            self.stdout.write(f'  {query.sql}')
+            if query.plan and not options['no_plan']:
+                for line in query.plan.splitlines():
+                    self.stdout.write(f'    {line}')
+            self.stdout.write('')
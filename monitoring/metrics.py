@@ -0,0 +1,120 @@
+import functools
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .profiling import record_span
+
+# Buckets in seconds, tuned for API requests and the DB/Redis calls inside them
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling a request',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries executed per request',
+    ['method', 'route'],
+    buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in database queries per request',
+    ['method', 'route'],
+    buckets=LATENCY_BUCKETS
+)
+REDIS_PUBLISH_LATENCY = Histogram(
+    'redis_publish_duration_seconds',
+    'Time spent publishing an event to Redis',
+    ['stream'],
+    buckets=LATENCY_BUCKETS
+)
+REDIS_PUBLISH_FAILURES = Counter(
+    'redis_publish_failures_total',
+    'Events that could not be published to Redis',
+    ['stream']
+)
+REDIS_SPILLED_EVENTS = Counter(
+    'redis_spilled_events_total',
+    'Events kept in the local spill buffer because Redis was unavailable',
+    ['stream']
+)
+REDIS_SPILL_DROPPED = Counter(
+    'redis_spill_dropped_events_total',
+    'Spilled events discarded because the spill buffer was full'
+)
+REDIS_REPLAYED_EVENTS = Counter(
+    'redis_replayed_events_total',
+    'Spilled events published after Redis recovered',
+    ['stream']
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    'circuit_breaker_state',
+    'Circuit breaker state: 0 closed, 1 half-open, 2 open',
+    ['breaker'],
+    multiprocess_mode='livemax'
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    'circuit_breaker_transitions_total',
+    'Circuit breaker state changes, labelled by the state entered',
+    ['breaker', 'state']
+)
+SIGNAL_HANDLER_LATENCY = Histogram(
+    'signal_handler_duration_seconds',
+    'Time spent in model signal handlers',
+    ['handler'],
+    buckets=LATENCY_BUCKETS
+)
+
+
+def timed_signal_handler(func):
+    """Record how long a signal receiver takes, labelled by its module and name"""
+    name = f'{func.__module__}.{func.__name__}'
+    histogram = SIGNAL_HANDLER_LATENCY.labels(handler=name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - started
+            histogram.observe(duration)
+            record_span('signal', name, duration)
+    return wrapper
+
+
+@contextmanager
+def track_redis_publish(stream):
+    """Time a publish to `stream` and count it as failed if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        REDIS_PUBLISH_FAILURES.labels(stream=stream).inc()
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        REDIS_PUBLISH_LATENCY.labels(stream=stream).observe(duration)
+        record_span('redis', f'XADD {stream}', duration)
+
+
+class QueryCounter:
+    """connection.execute_wrapper callable that counts queries and their total time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
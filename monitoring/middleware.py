@@ -0,0 +1,88 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import profiling
+from .metrics import REQUEST_DB_TIME, REQUEST_LATENCY, REQUEST_QUERIES, QueryCounter
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, query count and query time for every request.
+    Requests are labelled by their URL pattern rather than the raw path,
+    so /api/tasks/<pk>/ is one series no matter how many tasks exist.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.route if match else 'unmatched'
+        method = request.method
+
+        REQUEST_LATENCY.labels(method=method, route=route, status=response.status_code).observe(duration)
+        REQUEST_QUERIES.labels(method=method, route=route).observe(queries.count)
+        REQUEST_DB_TIME.labels(method=method, route=route).observe(queries.duration)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Capture a cProfile trace of a single request on demand.
+
+    Staff users opt in per request with the `X-Profile: 1` header or the
+    `?_profile=1` query flag. Requests without the flag only pay for the
+    flag lookup; everyone who is not staff is served normally.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled or not self.requested(request):
+            return self.get_response(request)
+
+        user = self.staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        response, trace, profile = profiling.profile_request(request, self.get_response)
+        try:
+            record = profiling.store_trace(request, response, trace, profile, user)
+            response['X-Profile-Trace'] = str(record.id)
+        except Exception as e:
+            logger.error(f"Error storing request trace: {str(e)}", exc_info=True)
+        return response
+
+    def requested(self, request):
+        return (
+            request.META.get('HTTP_X_PROFILE') == '1'
+            or request.GET.get('_profile') == '1'
+        )
+
+    def staff_user(self, request):
+        """Resolve the caller from the session or, for API clients, the JWT"""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user if user.is_staff else None
+
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except Exception:
+            return None
+        if result is None or not result[0].is_staff:
+            return None
+        return result[0]
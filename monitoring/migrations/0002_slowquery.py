@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=32, unique=True)),
+                ('sql', models.TextField(help_text='Statement with literals and parameters replaced by ?')),
+                ('sample_sql', models.TextField(help_text='First slow occurrence with its parameters')),
+                ('plan', models.TextField(blank=True, help_text='EXPLAIN output captured when the fingerprint was first seen')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_time_ms', models.FloatField(default=0)),
+                ('max_time_ms', models.FloatField(default=0)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Slow queries',
+                'ordering': ['-total_time_ms'],
+            },
+        ),
+    ]
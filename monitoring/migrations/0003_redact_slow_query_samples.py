@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:04
+
+import re
+
+from django.db import migrations, models
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def redact_samples(apps, schema_editor):
+    # Samples used to end with ' -- params: <repr of the parameters>'
+    SlowQuery = apps.get_model('monitoring', 'SlowQuery')
+    for query in SlowQuery.objects.filter(sample_sql__contains=' -- params: '):
+        sample = query.sample_sql.rsplit(' -- params: ', 1)[0]
+        query.sample_sql = STRING_LITERAL.sub("'?'", sample)
+        query.save(update_fields=['sample_sql'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0002_slowquery'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='slowquery',
+            name='sample_sql',
+            field=models.TextField(help_text='First slow occurrence as executed; parameters are never stored and string literals are redacted'),
+        ),
+        migrations.RunPython(redact_samples, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+from django.db import models
+from users.models import User
+
+
+class RequestTrace(models.Model):
+    """
+    Profile of a single request captured on demand by a staff user.
+    The table is a ring buffer: only the newest PROFILING_MAX_TRACES rows are kept.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    query_time_ms = models.FloatField(default=0)
+    spans = models.JSONField(
+        default=list,
+        help_text="SQL, Redis and signal handler spans in the order they ran"
+    )
+    profile = models.TextField(help_text="cProfile statistics sorted by cumulative time")
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class SlowQuery(models.Model):
+    """Aggregated statistics for one normalized SQL statement that exceeded the slow query threshold"""
+    fingerprint = models.CharField(max_length=32, unique=True)
+    sql = models.TextField(help_text="Statement with literals and parameters replaced by ?")
+    sample_sql = models.TextField(
+        help_text="First slow occurrence as executed; parameters are never stored and string literals are redacted"
+    )
+    plan = models.TextField(blank=True, help_text="EXPLAIN output captured when the fingerprint was first seen")
+    count = models.PositiveIntegerField(default=0)
+    total_time_ms = models.FloatField(default=0)
+    max_time_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-total_time_ms']
+        verbose_name_plural = "Slow queries"
+
+    def __str__(self):
+        return self.sql[:100]
+
+    @property
+    def average_time_ms(self):
+        return self.total_time_ms / self.count if self.count else 0
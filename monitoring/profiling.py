@@ -0,0 +1,90 @@
+import cProfile
+import io
+import logging
+import pstats
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# The trace being captured for the current request, if any
+_active_trace = ContextVar('active_trace', default=None)
+
+
+class Trace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.query_count = 0
+        self.query_time = 0.0
+
+    def add_span(self, kind, name, duration):
+        self.spans.append({
+            'kind': kind,
+            'name': name,
+            'start_ms': round((time.perf_counter() - duration - self.started) * 1000, 3),
+            'duration_ms': round(duration * 1000, 3),
+        })
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook recording every query as a span"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.query_time += duration
+            self.add_span('sql', sql, duration)
+
+
+def record_span(kind, name, duration):
+    """Attach a span to the trace being captured, a no-op for every other request"""
+    trace = _active_trace.get()
+    if trace is not None:
+        trace.add_span(kind, name, duration)
+
+
+def profile_request(request, get_response):
+    """Run the request under cProfile and return (response, trace, stats text)"""
+    trace = Trace()
+    token = _active_trace.set(trace)
+    profiler = cProfile.Profile()
+    try:
+        from django.db import connection
+        with connection.execute_wrapper(trace):
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+    finally:
+        _active_trace.reset(token)
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats('cumulative').print_stats(getattr(settings, 'PROFILING_STATS_LINES', 60))
+    return response, trace, output.getvalue()
+
+
+def store_trace(request, response, trace, profile, user):
+    from .models import RequestTrace
+
+    duration = time.perf_counter() - trace.started
+    record = RequestTrace.objects.create(
+        user=user,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000, 3),
+        query_count=trace.query_count,
+        query_time_ms=round(trace.query_time * 1000, 3),
+        spans=trace.spans,
+        profile=profile
+    )
+    # Ids only grow, so everything older than the newest N rows is one range delete
+    max_traces = getattr(settings, 'PROFILING_MAX_TRACES', 50)
+    RequestTrace.objects.filter(id__lte=record.id - max_traces).delete()
+    return record
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH')
+
+# Set while this thread records a slow query, so the bookkeeping SQL is never captured itself
+_state = threading.local()
+
+
+def normalize(sql):
+    """Reduce a statement to its shape so queries differing only in values share a fingerprint"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    # IN lists of any length collapse to one form
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def redact(sql):
+    """The statement as executed, minus string literals; parameters are kept out entirely"""
+    return _STRING_LITERAL.sub("'?'", sql)
+
+
+def fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode()).hexdigest()
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return ''
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                return '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+    except Exception as e:
+        return f'EXPLAIN failed: {e}'
+
+
+class Capture:
+    __slots__ = ('sql', 'sample_sql', 'params', 'count', 'total_time_ms', 'max_time_ms')
+
+    def __init__(self, sql, sample_sql, params):
+        self.sql = sql
+        self.sample_sql = sample_sql
+        self.params = params
+        self.count = 0
+        self.total_time_ms = 0.0
+        self.max_time_ms = 0.0
+
+
+# Pending captures per (database alias, fingerprint). Writing from inside the
+# execute wrapper would interleave with the caller's open cursor, so captures
+# are buffered and written at request end.
+_pending = {}
+_lock = threading.Lock()
+
+
+def capture(connection, sql, params, duration):
+    normalized = normalize(sql)
+    key = (connection.alias, fingerprint(normalized))
+    duration_ms = duration * 1000
+    with _lock:
+        entry = _pending.get(key)
+        if entry is None:
+            entry = _pending[key] = Capture(normalized, sql, params)
+        entry.count += 1
+        entry.total_time_ms += duration_ms
+        entry.max_time_ms = max(entry.max_time_ms, duration_ms)
+    logger.warning(f"Slow query ({duration_ms:.1f} ms): {normalized[:200]}")
+
+
+def flush(**kwargs):
+    """Write buffered captures, explaining fingerprints that are not stored yet"""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return
+
+    from .models import SlowQuery
+
+    _state.recording = True
+    try:
+        for (alias, key), entry in pending.items():
+            try:
+                _write(SlowQuery, connections[alias], key, entry)
+            except Exception as e:
+                logger.error(f"Error recording slow query: {str(e)}", exc_info=True)
+    finally:
+        _state.recording = False
+
+
+def _write(model, connection, key, entry):
+    increments = {
+        'count': F('count') + entry.count,
+        'total_time_ms': F('total_time_ms') + entry.total_time_ms,
+        'max_time_ms': Greatest('max_time_ms', entry.max_time_ms),
+        'last_seen': timezone.now(),
+    }
+    queryset = model.objects.using(connection.alias).filter(fingerprint=key)
+    if queryset.update(**increments):
+        return
+
+    # New fingerprint: this is the only time the plan is captured
+    try:
+        with transaction.atomic(using=connection.alias):
+            model.objects.using(connection.alias).create(
+                fingerprint=key,
+                sql=entry.sql,
+                # Parameters hold password hashes, tokens and personal data; they
+                # only reach EXPLAIN, in memory
+                sample_sql=redact(entry.sample_sql)[:10000],
+                plan=explain(connection, entry.sample_sql, entry.params),
+                count=entry.count,
+                total_time_ms=entry.total_time_ms,
+                max_time_ms=entry.max_time_ms
+            )
+    except IntegrityError:
+        # Another process recorded it first
+        queryset.update(**increments)
+
+
+class SlowQueryWrapper:
+    """
+    connection.execute_wrapper hook that times every statement and records
+    the ones slower than SLOW_QUERY_THRESHOLD_MS.
+    """
+
+    def __init__(self, connection, threshold_ms):
+        self.connection = connection
+        self.threshold = threshold_ms / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_state, 'recording', False):
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        # executemany batches are bulk writes, not candidates for a missing index
+        if duration >= self.threshold and not many:
+            capture(self.connection, sql, params, duration)
+        return result
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver attaching the wrapper to every new connection"""
+    if not getattr(settings, 'SLOW_QUERY_CAPTURE', True):
+        return
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200)
+    connection.execute_wrappers.append(SlowQueryWrapper(connection, threshold))
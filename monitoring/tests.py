@@ -0,0 +1,39 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from users.models import User
+
+from .models import SlowQuery
+from .slow_queries import Capture, _write
+
+
+@override_settings(METRICS_TOKEN='scrape-secret', METRICS_ALLOWED_IPS=frozenset({'10.0.0.5'}))
+class MetricsAccessTests(TestCase):
+    def test_anonymous_clients_are_refused(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+    def test_scrapers_with_the_token_or_an_allowed_address_get_metrics(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE', response.content)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+    def test_staff_sessions_get_metrics(self):
+        staff = User.objects.create_user(username='ops', email='ops@example.com', password='pw12345!', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class SlowQueryTests(TestCase):
+    def test_samples_never_store_parameters(self):
+        sql = "SELECT id FROM users_user WHERE password = %s AND email = 'ada@example.com'"
+        entry = Capture(sql, sql, ['pbkdf2_sha256$secret-hash'])
+        entry.count, entry.total_time_ms, entry.max_time_ms = 1, 250.0, 250.0
+        _write(SlowQuery, connection, 'f' * 32, entry)
+
+        sample = SlowQuery.objects.get().sample_sql
+        self.assertNotIn('secret-hash', sample)
+        self.assertNotIn('ada@example.com', sample)
+        self.assertEqual(sample, "SELECT id FROM users_user WHERE password = %s AND email = '?'")
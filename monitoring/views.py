@@ -0,0 +1,36 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+
+def scrape_allowed(request):
+    """A bearer METRICS_TOKEN, a METRICS_ALLOWED_IPS address or a staff session"""
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(), f'Bearer {token}'.encode()
+    ):
+        return True
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def metrics(request):
+    """
+    Expose metrics in the Prometheus text format.
+    Under gunicorn every worker writes its samples to mmap'd files in
+    PROMETHEUS_MULTIPROC_DIR, and any worker serving this view merges all of them.
+    """
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -29,11 +29,11 @@ class ProfileAdmin(ModelAdmin):
     list_display = ('user', 'display_name', 'location', 'theme_preference', 'created_at')
     list_filter = ('theme_preference', 'created_at')
     search_fields = ('user__email', 'user__username', 'display_name', 'location')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('avatar_hash', 'created_at', 'updated_at')
     
     fieldsets = (
         ('User Information', {
-            'fields': ('user', 'display_name', 'avatar')
+            'fields': ('user', 'display_name', 'avatar', 'avatar_hash')
         }),
         ('Personal Details', {
             'fields': ('bio', 'location', 'website', 'timezone')
@@ -0,0 +1,98 @@
+"""
+JWT authentication that resolves users from a per-process cache.
+
+Tokens carry the user's token_version, which logout bumps to revoke every token
+issued before it. CachedJWTAuthentication keeps recently seen users for
+AUTH_USER_CACHE_TTL seconds keyed by user id, so a request with a warm cache
+authenticates without touching the database. Misses load the user together with
+the profile and seed the timezone cache from it. Saving or deleting the user or
+profile drops the entry in this process. Other processes pick the change up when
+the entry expires, or right away when the token is newer than their cached copy.
+"""
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .caching import TTLCache
+from .models import User
+from .timezones import remember_user_zone
+
+TOKEN_VERSION_CLAIM = 'token_version'
+
+# Concrete fields a cached user is rebuilt from
+USER_FIELDS = tuple(field.attname for field in User._meta.concrete_fields)
+
+_users = TTLCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+class VersionedRefreshToken(RefreshToken):
+    """Refresh token carrying the user's token_version; access tokens made from it copy the claim"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+def token_version(token):
+    # Tokens issued before versioning count as version 0
+    return token.get(TOKEN_VERSION_CLAIM, 0)
+
+
+def invalidate_user(user_id):
+    _users.invalidate(str(user_id))
+
+
+def load_user(user_id):
+    """Cached field values for a user, loading them (and the profile timezone) on a miss"""
+    user = User.objects.select_related('profile').filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+    if user is None:
+        return None
+    profile = getattr(user, 'profile', None)
+    if profile is not None:
+        remember_user_zone(user.pk, profile.timezone)
+    values = tuple(getattr(user, name) for name in USER_FIELDS)
+    _users.set(str(user_id), values)
+    return values
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = token_version(validated_token)
+        values = _users.get(str(user_id))
+        if values is None or values[USER_FIELDS.index('token_version')] < version:
+            # Missing, or cached before the version this token was issued with
+            values = load_user(user_id)
+        if values is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        # Every request gets its own instance, so nothing a view does leaks into the cache
+        user = User.from_db('default', USER_FIELDS, values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if user.token_version != version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return user
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuse refresh tokens issued before the user's last logout"""
+    token_class = VersionedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        current = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list('token_version', flat=True).first()
+        if current is None or current != token_version(refresh):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return super().validate(attrs)
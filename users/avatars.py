@@ -0,0 +1,203 @@
+"""
+Avatar processing off the request thread.
+
+An upload is hashed (SHA-256 of the raw bytes) and handed to a bounded thread
+pool. Workers decode it with Pillow, apply the EXIF orientation, crop it to a
+square and encode every size in AVATAR_SIZES as WebP and JPEG. Nothing from the
+original is copied over, so EXIF, GPS and ICC metadata are dropped. Files live
+under a path derived from the hash:
+
+    avatars/<hash[:2]>/<hash>/<size>.<ext>
+
+Identical uploads map to the same files and are only encoded once. Those paths
+never change content, so they can be cached forever. Each file is written under
+a temporary name in MEDIA_ROOT and renamed into place, so a reader never sees a
+partial file and two workers encoding the same upload both end with one copy.
+
+The upload's hash is recorded in Profile.avatar_pending when it is queued.
+Profile.avatar_hash is set once every variant has been written, and only if the
+upload is still the pending one: a newer upload or a removal in the meantime
+wins. Until then the previous avatar is still served. Files may be shared
+between profiles, so removing an avatar only clears the hashes.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZES = (64, 128, 256)
+# Extension -> (Pillow format, save options)
+AVATAR_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+
+
+class AvatarError(Exception):
+    """The upload is not an image we can process"""
+
+
+class AvatarQueueFull(Exception):
+    """Every worker is busy and the pending queue is at AVATAR_MAX_PENDING"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def variant_path(avatar_hash, size, ext):
+    return f'avatars/{avatar_hash[:2]}/{avatar_hash}/{size}.{ext}'
+
+
+def variant_url(avatar_hash, size, ext):
+    return default_storage.url(variant_path(avatar_hash, size, ext))
+
+
+def closest_size(requested):
+    """Smallest rendered size that covers `requested` pixels, the largest if none does"""
+    for size in AVATAR_SIZES:
+        if size >= requested:
+            return size
+    return AVATAR_SIZES[-1]
+
+
+def inspect(data):
+    """
+    Check the upload from its header alone, without decoding the pixels.
+    Raises AvatarError for anything that is not a supported image or is too large.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError:
+        # Pillow refuses images over twice its own MAX_IMAGE_PIXELS before we can check
+        raise AvatarError('Image dimensions are too large.')
+    except (UnidentifiedImageError, OSError):
+        raise AvatarError('File is not a valid image.')
+    if image.format not in ALLOWED_FORMATS:
+        raise AvatarError(f'Unsupported image format {image.format}.')
+    if image.width * image.height > settings.AVATAR_MAX_PIXELS:
+        raise AvatarError('Image dimensions are too large.')
+
+
+def render(data):
+    """Encode every variant of an upload; returns {(size, ext): bytes}"""
+    image = Image.open(io.BytesIO(data))
+    # JPEGs can be decoded at a reduced scale, which is most of the work for camera photos
+    image.draft('RGB', (AVATAR_SIZES[-1], AVATAR_SIZES[-1]))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+
+    variants = {}
+    for size in sorted(AVATAR_SIZES, reverse=True):
+        # Each size is scaled from the previous, larger one
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for ext, (image_format, options) in AVATAR_FORMATS.items():
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, **options)
+            variants[(size, ext)] = buffer.getvalue()
+    return variants
+
+
+def write_file(name, content):
+    """Write `content` to storage path `name` through a temporary file and an atomic rename"""
+    path = default_storage.path(name)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        # mkstemp creates the file owner-only; match what the storage would have used
+        os.chmod(temp_path, default_storage.file_permissions_mode or 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def store(avatar_hash, data):
+    """Write the variants for `avatar_hash` unless an identical upload already did"""
+    marker = (AVATAR_SIZES[-1], 'jpg')
+    if default_storage.exists(variant_path(avatar_hash, *marker)):
+        return False
+
+    variants = render(data)
+    # The marker variant is written last, so its presence means the whole set exists
+    for size, ext in [key for key in variants if key != marker] + [marker]:
+        write_file(variant_path(avatar_hash, size, ext), variants[(size, ext)])
+    return True
+
+
+class AvatarProcessor:
+    """Bounded pool of worker threads; Pillow releases the GIL while it resizes and encodes"""
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        # Threads do not survive a fork, so a gunicorn worker starts its own pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='avatar')
+            return self._executor
+
+    def submit(self, profile_id, data):
+        """
+        Queue an upload for `profile_id`, mark it as the profile's pending avatar and
+        return its content hash. Raises AvatarQueueFull rather than queueing past the bound.
+        """
+        executor = self._get_executor()
+        if not self._slots.acquire(blocking=False):
+            raise AvatarQueueFull()
+        avatar_hash = content_hash(data)
+        try:
+            Profile.objects.filter(pk=profile_id).update(avatar_pending=avatar_hash)
+        except BaseException:
+            self._slots.release()
+            raise
+        executor.submit(self._process, profile_id, avatar_hash, data)
+        return avatar_hash
+
+    def _process(self, profile_id, avatar_hash, data):
+        try:
+            encoded = store(avatar_hash, data)
+            # Uploads from before the pipeline were stored as-is in Profile.avatar
+            legacy = Profile.objects.filter(pk=profile_id).values_list('avatar', flat=True).first()
+            # One conditional UPDATE, so a newer upload or a removal in the meantime is not undone
+            applied = Profile.objects.filter(pk=profile_id, avatar_pending=avatar_hash).update(
+                avatar=None, avatar_hash=avatar_hash, avatar_pending='', updated_at=timezone.now()
+            )
+            if not applied:
+                logger.info(f"Avatar {avatar_hash[:12]} for profile {profile_id} was superseded")
+                return
+            if legacy:
+                default_storage.delete(legacy)
+            logger.info(f"Avatar {avatar_hash[:12]} {'encoded' if encoded else 'reused'} for profile {profile_id}")
+        except Exception as e:
+            logger.error(f"Error processing avatar for profile {profile_id}: {str(e)}", exc_info=True)
+        finally:
+            self._slots.release()
+            connection.close()
+
+
+processor = AvatarProcessor(settings.AVATAR_WORKERS, settings.AVATAR_MAX_PENDING)
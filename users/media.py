@@ -0,0 +1,102 @@
+"""
+Serving of content-hashed avatar files.
+
+Paths under avatars/<hash[:2]>/<hash>/ never change content (see users.avatars),
+so responses are cacheable forever and the ETag is derived from the path. A
+revalidation is answered with 304 without opening the file. Single byte ranges
+are supported. Full responses are FileResponses, which gunicorn sends with
+os.sendfile through wsgi.file_wrapper. When MEDIA_X_ACCEL_REDIRECT is set,
+the file is handed to nginx with X-Accel-Redirect instead.
+
+WhiteNoise only serves STATIC_URL and indexes its files at startup, so it
+cannot serve uploads that appear at runtime. This view covers avatars in every
+environment; other media is still served by django.conf.urls.static in DEBUG.
+"""
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+
+from .avatars import AVATAR_FORMATS, AVATAR_SIZES, variant_path
+
+# A year, the longest max-age caches are expected to honour
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CONTENT_TYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, length):
+    """
+    (start, end) inclusive for a single 'bytes=' range, None to ignore the header.
+    Raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None  # Malformed or multiple ranges; a full response is allowed
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(0, length - int(last)), length - 1
+    else:
+        start = int(first)
+        end = min(int(last), length - 1) if last else length - 1
+    if start > end or start >= length:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def immutable_headers(response, etag):
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_avatar(request, prefix, avatar_hash, size, ext):
+    size = int(size)
+    if prefix != avatar_hash[:2] or size not in AVATAR_SIZES or ext not in AVATAR_FORMATS:
+        raise Http404('Unknown avatar')
+
+    etag = f'"{avatar_hash}-{size}.{ext}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return immutable_headers(HttpResponseNotModified(), etag)
+
+    name = variant_path(avatar_hash, size, ext)
+    if settings.MEDIA_X_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=CONTENT_TYPES[ext])
+        response['X-Accel-Redirect'] = settings.MEDIA_X_ACCEL_REDIRECT + name
+        return immutable_headers(response, etag)
+
+    try:
+        file = default_storage.open(name, 'rb')
+    except FileNotFoundError:
+        raise Http404('Unknown avatar')
+    length = file.size
+
+    # If-Range: a partial response only if the client still holds this exact representation
+    range_header = request.headers.get('Range')
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(range_header, length)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{length}'
+            return immutable_headers(response, etag)
+        if byte_range:
+            start, end = byte_range
+            with file:
+                file.seek(start)
+                content = file.read(end - start + 1)
+            response = HttpResponse(content, status=206, content_type=CONTENT_TYPES[ext])
+            response['Content-Range'] = f'bytes {start}-{end}/{length}'
+            return immutable_headers(response, etag)
+
+    response = FileResponse(file, content_type=CONTENT_TYPES[ext])
+    return immutable_headers(response, etag)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_pending',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
 
+from config.write_queue import write_queue
+
 # Create your models here.
 class User(AbstractUser):
     uid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -10,6 +12,8 @@ class User(AbstractUser):
     username = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Copied into every JWT; bumping it (on logout) revokes all tokens issued before
+    token_version = models.PositiveIntegerField(default=0, editable=False)
     
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ['username']
@@ -41,6 +45,11 @@ class Profile(models.Model):
         null=True,
         blank=True
     )
+    # SHA-256 of the uploaded image; the resized variants live under
+    # avatars/<hash[:2]>/<hash>/ (see users.avatars)
+    avatar_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Hash of the upload still being processed; cleared once applied or removed
+    avatar_pending = models.CharField(max_length=64, blank=True, editable=False)
     bio = models.TextField(blank=True)
     location = models.CharField(max_length=255, blank=True)
     website = models.URLField(blank=True)
@@ -76,8 +85,12 @@ class Profile(models.Model):
     
     def ensure_completion_stats(self):
         """Ensure CompletionStats exists for this profile"""
-        stats, created = CompletionStats.objects.get_or_create(profile=self)
-        return stats
+        # Served from the relation cache after the first call or a select_related
+        try:
+            return self.completion_stats
+        except CompletionStats.DoesNotExist:
+            stats, created = CompletionStats.objects.get_or_create(profile=self)
+            return stats
     
     @property
     def completion_rate_percentage(self):
@@ -136,8 +149,9 @@ class CompletionStats(models.Model):
             user=user,
             completed=False
         ).count()
-        
-        self.save()
+
+        # Refreshed on reads as well as task writes, so this goes through the group-commit queue
+        write_queue.run(self.save)
 
     @property
     def completion_rate(self):
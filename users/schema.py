@@ -0,0 +1,66 @@
+import graphene
+from django.conf import settings
+from graphene.types.generic import GenericScalar
+from graphene_django import DjangoObjectType
+
+from api.schema import current_user
+from .avatars import closest_size, variant_url
+from .models import Profile
+
+
+class CompletionStatsType(graphene.ObjectType):
+    total = graphene.Int(required=True)
+    completed = graphene.Int(required=True)
+    active = graphene.Int(required=True)
+    completion_rate = graphene.Int(required=True)
+
+
+class ProfileType(DjangoObjectType):
+    email = graphene.String(required=True)
+    username = graphene.String(required=True)
+    avatar = graphene.String(size=graphene.Int(default_value=settings.AVATAR_DEFAULT_SIZE))
+    notification_preferences = GenericScalar(required=True)
+    stats = graphene.Field(CompletionStatsType, required=True)
+
+    class Meta:
+        model = Profile
+        fields = (
+            'display_name', 'bio', 'location', 'website', 'timezone',
+            'theme_preference', 'created_at', 'updated_at'
+        )
+        convert_choices_to_enum = False
+
+    def resolve_email(self, info):
+        return self.user.email
+
+    def resolve_username(self, info):
+        return self.user.username
+
+    def resolve_avatar(self, info, size):
+        if self.avatar_hash:
+            url = variant_url(self.avatar_hash, closest_size(size), 'webp')
+        elif self.avatar:
+            url = self.avatar.url
+        else:
+            return None
+        return info.context.build_absolute_uri(url)
+
+    def resolve_stats(self, info):
+        # The stored counters are kept current by the task signals, so they are not recomputed here
+        stats = self.ensure_completion_stats()
+        return CompletionStatsType(
+            total=stats.total,
+            completed=stats.completed,
+            active=stats.active,
+            completion_rate=stats.completion_rate
+        )
+
+
+class Query(graphene.ObjectType):
+    me = graphene.Field(ProfileType, required=True)
+
+    def resolve_me(self, info):
+        user = current_user(info)
+        profile = Profile.objects.select_related('completion_stats').get(user=user)
+        profile.user = user
+        return profile
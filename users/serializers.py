@@ -2,7 +2,10 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
+from django.conf import settings
 from .models import User, Profile, CompletionStats
+from .avatars import AVATAR_FORMATS, AVATAR_SIZES, closest_size, variant_url
+from .timezones import is_valid_timezone
 
 User = get_user_model()
 
@@ -34,13 +37,14 @@ class ProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
     avatar = serializers.SerializerMethodField()
+    avatar_variants = serializers.SerializerMethodField()
     completion_rate = serializers.IntegerField(source='completion_rate_percentage', read_only=True)
     stats = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
         fields = [
-            'id', 'email', 'username', 'display_name', 'avatar',
+            'id', 'email', 'username', 'display_name', 'avatar', 'avatar_variants',
             'bio', 'location', 'website', 'timezone',
             'theme_preference', 'notification_preferences',
             'completion_rate', 'stats',
@@ -48,14 +52,37 @@ class ProfileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'email', 'username', 'created_at', 'updated_at']
 
+    def _absolute(self, url):
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+
+    def _avatar_size(self):
+        """Pixel size the client asked for with ?avatar_size=, or AVATAR_DEFAULT_SIZE"""
+        request = self.context.get('request')
+        try:
+            return int(request.query_params.get('avatar_size', settings.AVATAR_DEFAULT_SIZE))
+        except (AttributeError, ValueError):
+            return settings.AVATAR_DEFAULT_SIZE
+
     def get_avatar(self, obj):
+        """WebP rendition closest to the requested size"""
+        if obj.avatar_hash:
+            return self._absolute(variant_url(obj.avatar_hash, closest_size(self._avatar_size()), 'webp'))
         if obj.avatar:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.avatar.url)
-            return obj.avatar.url
+            return self._absolute(obj.avatar.url)
         return None
 
+    def get_avatar_variants(self, obj):
+        """Every rendition as {size: {format: url}}, for srcset and <picture> fallbacks"""
+        if not obj.avatar_hash:
+            return None
+        return {
+            str(size): {ext: self._absolute(variant_url(obj.avatar_hash, size, ext)) for ext in AVATAR_FORMATS}
+            for size in AVATAR_SIZES
+        }
+
     def get_stats(self, obj):
         """Get task statistics in a frontend-friendly format"""
         return obj.task_stats
@@ -87,7 +114,6 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
 
     def validate_timezone(self, value):
         """Validate timezone"""
-        import pytz
-        if value not in pytz.all_timezones:
+        if not is_valid_timezone(value):
             raise serializers.ValidationError("Invalid timezone")
         return value
@@ -3,34 +3,60 @@ from django.conf import settings
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from api import jobs
 from api.models import Task
+from monitoring.metrics import timed_signal_handler
 from users.models import Profile, CompletionStats
+from users.authentication import invalidate_user
+from users.tasks import refresh_completion_stats
+from users.timezones import invalidate_user_zone
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@timed_signal_handler
 def create_user_profile(sender, instance, created, **kwargs):
     """Create Profile when a new User is created"""
     if created:
         Profile.objects.create(user=instance)
 
 @receiver(post_save, sender=Profile)
+@timed_signal_handler
 def create_profile_stats(sender, instance, created, **kwargs):
     """Create CompletionStats when a Profile is created"""
     if created:
         CompletionStats.objects.create(profile=instance)
 
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@timed_signal_handler
+def invalidate_profile_timezone(sender, instance, **kwargs):
+    """Drop the cached zone so the next lookup sees the saved timezone"""
+    invalidate_user_zone(instance.user_id)
+    invalidate_user(instance.user_id)
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+@timed_signal_handler
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the user from the authentication cache so the next request reloads it"""
+    invalidate_user(instance.pk)
+
 @receiver(post_save, sender=Task)
 @receiver(post_delete, sender=Task)
+@timed_signal_handler
 def update_task_stats(sender, instance, **kwargs):
     """Update completion stats when tasks are modified"""
-    profile = instance.user.profile
-    stats = profile.ensure_completion_stats()
-    stats.update_stats()
+    # Recounted by a worker once the write commits, once per user and request
+    jobs.enqueue(refresh_completion_stats, instance.user_id)
 
 # Connect the signals
 def ready():
     """Connect signals when the app is ready"""
     post_save.connect(create_user_profile, sender=settings.AUTH_USER_MODEL)
     post_save.connect(create_profile_stats, sender=Profile)
+    post_save.connect(invalidate_profile_timezone, sender=Profile)
+    post_delete.connect(invalidate_profile_timezone, sender=Profile)
+    post_save.connect(invalidate_cached_user, sender=settings.AUTH_USER_MODEL)
+    post_delete.connect(invalidate_cached_user, sender=settings.AUTH_USER_MODEL)
     post_save.connect(update_task_stats, sender=Task)
     post_delete.connect(update_task_stats, sender=Task)
\ No newline at end of file
@@ -0,0 +1,21 @@
+from celery import shared_task
+from django.db import OperationalError
+
+from .models import Profile
+
+
+@shared_task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=5)
+def refresh_completion_stats(user_id, items=()):
+    """Recount a user's CompletionStats; dispatched through api.jobs once per request"""
+    profile = Profile.objects.select_related('user', 'completion_stats').filter(user_id=user_id).first()
+    # The user was deleted along with their tasks
+    if profile is None:
+        return
+    profile.ensure_completion_stats().update_stats()
+
+
+@shared_task
+def recount_all_completion_stats():
+    """Nightly sweep that corrects any CompletionStats a lost job left stale"""
+    for profile in Profile.objects.select_related('user', 'completion_stats').iterator(chunk_size=500):
+        profile.ensure_completion_stats().update_stats()
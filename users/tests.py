@@ -1,3 +1,126 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import avatars
+from .models import Profile, User
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='ada', email='ada@example.com', password='pw12345!')
+        self.client = APIClient()
+        response = self.client.post('/api/users/login/', {'email': 'ada@example.com', 'password': 'pw12345!'})
+        self.access, self.refresh = response.data['access'], response.data['refresh']
+
+    def get_tasks(self, access):
+        return self.client.get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_logout_revokes_issued_tokens(self):
+        self.assertEqual(self.get_tasks(self.access).status_code, 200)
+
+        response = self.client.post('/api/users/logout/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_tasks(self.access).status_code, 401)
+        response = self.client.post('/api/users/token-refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_tokens_issued_after_logout_work(self):
+        self.client.post('/api/users/logout/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+        response = self.client.post('/api/users/login/', {'email': 'ada@example.com', 'password': 'pw12345!'})
+        self.assertEqual(self.get_tasks(response.data['access']).status_code, 200)
+
+
+def png(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'PNG')
+    return SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+
+
+class StaleStorage:
+    """Storage whose existence checks miss everything, as they would have before another worker wrote"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def exists(self, name):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
+
+        self.user = User.objects.create_user(username='ada', email='ada@example.com', password='pw12345!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, image):
+        return self.client.post('/api/profile/upload_avatar/', {'avatar': image}, format='multipart')
+
+    def test_decompression_bombs_are_rejected(self):
+        # Pillow raises instead of warning past twice MAX_IMAGE_PIXELS
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            response = self.upload(png((20, 20)))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Image dimensions are too large.'})
+
+    def test_workers_racing_on_one_upload_leave_one_copy_of_each_file(self):
+        data = png((300, 200)).read()
+        avatar_hash = avatars.content_hash(data)
+        avatars.store(avatar_hash, data)
+        # A second worker checked for the files before the first one wrote them
+        with mock.patch.object(avatars, 'default_storage', StaleStorage(avatars.default_storage)):
+            avatars.store(avatar_hash, data)
+
+        directory = os.path.join(self.media_root, os.path.dirname(avatars.variant_path(avatar_hash, 64, 'jpg')))
+        self.assertCountEqual(os.listdir(directory), [
+            f'{size}.{ext}' for size in avatars.AVATAR_SIZES for ext in avatars.AVATAR_FORMATS
+        ])
+
+    def run_queued_upload(self, *requests):
+        """Send `requests`, then run the avatar job they queued as a worker would"""
+        processor = avatars.AvatarProcessor(1, 4)
+        with mock.patch('users.views.processor', processor), \
+                mock.patch.object(avatars, 'ThreadPoolExecutor') as pool, \
+                mock.patch.object(avatars, 'connection'):
+            for request in requests:
+                request()
+            job, *args = pool.return_value.submit.call_args.args
+            job(*args)
+        return Profile.objects.get(user=self.user)
+
+    def test_processed_uploads_become_the_avatar(self):
+        image = png((300, 200))
+        data = image.read()
+        image.seek(0)
+        profile = self.run_queued_upload(lambda: self.upload(image))
+
+        self.assertEqual(profile.avatar_hash, avatars.content_hash(data))
+        self.assertEqual(profile.avatar_pending, '')
+
+    def test_removing_the_avatar_cancels_an_upload_in_flight(self):
+        profile = self.run_queued_upload(
+            lambda: self.upload(png((300, 200))),
+            lambda: self.client.delete('/api/profile/remove_avatar/')
+        )
+
+        self.assertEqual((profile.avatar_hash, profile.avatar_pending), ('', ''))
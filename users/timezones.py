@@ -0,0 +1,62 @@
+"""
+Timezone resolution for users.
+
+Profile.timezone names are validated against a frozenset of the IANA zones,
+and each user's resolved ZoneInfo is kept in a per-process LRU, so scheduling
+code can work in the user's local time without a profile query per call.
+Entries are dropped when the profile is saved or deleted in this process and
+expire after TIMEZONE_CACHE_TTL seconds, which bounds how long an edit made
+through another process goes unnoticed. Entries are keyed by the id's string
+form, since Celery tasks get ids back from JSON as strings.
+"""
+from datetime import timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, available_timezones
+
+from django.conf import settings
+
+from .caching import TTLCache
+
+
+@lru_cache(maxsize=1)
+def valid_timezones():
+    return frozenset(available_timezones())
+
+
+def is_valid_timezone(name):
+    return name in valid_timezones()
+
+
+@lru_cache(maxsize=None)
+def zone_for_name(name):
+    """ZoneInfo for a timezone name, falling back to UTC for blank or unknown names"""
+    if not name or not is_valid_timezone(name):
+        return dt_timezone.utc
+    return ZoneInfo(name)
+
+
+_zones = TTLCache(settings.TIMEZONE_CACHE_SIZE, settings.TIMEZONE_CACHE_TTL)
+
+
+def user_zone(user_id, fresh=False):
+    """
+    The user's profile timezone as a tzinfo, UTC if they have none.
+    `fresh` re-reads the profile even when it is cached, for workers that run apart
+    from the process that saved it and never see its invalidations.
+    """
+    zone = None if fresh else _zones.get(str(user_id))
+    if zone is None:
+        from .models import Profile
+        name = Profile.objects.filter(user_id=user_id).values_list('timezone', flat=True).first()
+        zone = zone_for_name(name)
+        _zones.set(str(user_id), zone)
+    return zone
+
+
+def remember_user_zone(user_id, timezone_name):
+    """Seed the cache from a profile that was loaded anyway"""
+    _zones.set(str(user_id), zone_for_name(timezone_name))
+
+
+def invalidate_user_zone(user_id):
+    _zones.invalidate(str(user_id))
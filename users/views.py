@@ -2,11 +2,14 @@ from rest_framework import status, viewsets, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from django.conf import settings
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 import logging
 
+from .authentication import VersionedRefreshToken, invalidate_user
+from .avatars import AvatarError, AvatarQueueFull, closest_size, inspect, processor, variant_url
 from .models import User, Profile, CompletionStats
 from .serializers import UserSerializer, RegisterSerializer, ProfileSerializer, ProfileUpdateSerializer
 
@@ -26,7 +29,7 @@ class UserViewSet(viewsets.GenericViewSet):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = VersionedRefreshToken.for_user(user)
             return Response({
                 'user': UserSerializer(user).data,
                 'refresh': str(refresh),
@@ -42,7 +45,7 @@ class UserViewSet(viewsets.GenericViewSet):
         try:
             user = User.objects.get(email=email)
             if user.check_password(password):
-                refresh = RefreshToken.for_user(user)
+                refresh = VersionedRefreshToken.for_user(user)
                 access_token = str(refresh.access_token)
                 request.session['session-name'] = access_token
                 return Response({
@@ -57,14 +60,17 @@ class UserViewSet(viewsets.GenericViewSet):
     @action(detail=False, methods=['post'], url_path='logout')
     def logout(self, request):
         """
-        Logout the user by blacklisting their refresh token and clearing their session.
+        Logout the user by revoking their tokens and clearing their session.
         """
         try:
+            # Bumping the version revokes every access and refresh token issued so far
+            User.objects.filter(pk=request.user.pk).update(token_version=F('token_version') + 1)
+            invalidate_user(request.user.pk)
+
             refresh_token = request.data.get('refresh_token')
-            if refresh_token:
-                # Blacklist the refresh token
-                token = RefreshToken(refresh_token)
-                token.blacklist()
+            # Only possible when the token_blacklist app is installed
+            if refresh_token and hasattr(VersionedRefreshToken, 'blacklist'):
+                VersionedRefreshToken(refresh_token).blacklist()
                 
             # Clear the session
             request.session.flush()
@@ -84,7 +90,7 @@ class UserViewSet(viewsets.GenericViewSet):
     @action(detail=False, methods=['get'], url_path='get-token')
     def get_jwt_token(request):
         if request.user.is_authenticated:
-            refresh = RefreshToken.for_user(request.user)
+            refresh = VersionedRefreshToken.for_user(request.user)
             access_token = str(refresh.access_token)
             return Response({
                 'access': access_token,
@@ -101,7 +107,7 @@ class UserViewSet(viewsets.GenericViewSet):
         user = request.user
         if user.is_authenticated:
             serializer = self.get_serializer(user)
-            refresh = RefreshToken.for_user(user)
+            refresh = VersionedRefreshToken.for_user(user)
             access_token = str(refresh.access_token)
             return Response({
                 "user":serializer.data,
@@ -125,7 +131,7 @@ class ProfileViewSet(viewsets.ModelViewSet):
 
     def get_object(self):
         """Get the user's profile and ensure CompletionStats exists"""
-        profile = get_object_or_404(Profile, user=self.request.user)
+        profile = get_object_or_404(Profile.objects.select_related('user', 'completion_stats'), user=self.request.user)
         profile.ensure_completion_stats()  # Ensure stats exist
         return profile
 
@@ -204,9 +210,14 @@ class ProfileViewSet(viewsets.ModelViewSet):
     def remove_avatar(self, request):
         """Remove the user's avatar"""
         profile = self.get_object()
-        if profile.avatar:
-            profile.avatar.delete()
+        if profile.avatar or profile.avatar_hash or profile.avatar_pending:
+            if profile.avatar:
+                profile.avatar.delete(save=False)
+            # Hashed files may be shared with other profiles, so they are left in place.
+            # Clearing the pending hash stops an upload still being processed from landing.
             profile.avatar = None
+            profile.avatar_hash = ''
+            profile.avatar_pending = ''
             profile.save()
             return Response({"status": "avatar removed"})
         return Response({"status": "no avatar to remove"})
@@ -225,10 +236,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
         image = request.FILES['avatar']
         
         # Validate file type
-        allowed_types = ['image/jpeg', 'image/png', 'image/gif']
+        allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
         if image.content_type not in allowed_types:
             return Response(
-                {"error": "Invalid file type. Only JPEG, PNG and GIF are allowed."},
+                {"error": "Invalid file type. Only JPEG, PNG, GIF and WebP are allowed."},
                 status=status.HTTP_400_BAD_REQUEST
             )
             
@@ -239,15 +250,27 @@ class ProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        # Delete old avatar if it exists
-        if profile.avatar:
-            profile.avatar.delete(save=False)
-            
-        # Save new avatar
-        profile.avatar = image
-        profile.save()
-        
+        data = image.read()
+        try:
+            inspect(data)
+        except AvatarError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Resizing and encoding happen on the avatar workers; the profile switches
+        # to the new avatar once every size is written
+        try:
+            avatar_hash = processor.submit(profile.pk, data)
+        except AvatarQueueFull:
+            return Response(
+                {"error": "Too many avatars are being processed. Please try again shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '5'}
+            )
+
         return Response({
-            "status": "avatar updated",
-            "avatar_url": request.build_absolute_uri(profile.avatar.url)
-        })
+            "status": "avatar processing",
+            "avatar_hash": avatar_hash,
+            "avatar_url": request.build_absolute_uri(
+                variant_url(avatar_hash, closest_size(settings.AVATAR_DEFAULT_SIZE), 'webp')
+            )
+        }, status=status.HTTP_202_ACCEPTED)